@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import os
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key starts the work, later callers wait for the
+    same result (or exception). The work runs as its own task so it is not
+    cancelled when the request that started it goes away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self):
+        return len(self._flights)
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by all processes on the host.
+
+    Used to coordinate uvicorn workers. The lock is acquired by polling so the
+    event loop is never blocked; if it can't be acquired within ``timeout``
+    seconds the holder is assumed to be stuck and the caller proceeds anyway.
+    The file is removed on release.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, poll_interval: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    @classmethod
+    def for_key(cls, lock_dir: str, key: str, **kwargs) -> "FileLock":
+        """Lock file for an arbitrary key inside lock_dir"""
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".lock"
+        return cls(os.path.join(lock_dir, name), **kwargs)
+
+    async def __aenter__(self):
+        if fcntl is None:
+            return self
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if loop.time() >= deadline:
+                            os.close(fd)
+                            return self
+                        await asyncio.sleep(self.poll_interval)
+
+                # The previous holder unlinks the file on release: if it did
+                # while we were waiting, lock the file now at path instead
+                try:
+                    if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                        self._fd = fd
+                        return self
+                except FileNotFoundError:
+                    pass
+            except BaseException:
+                os.close(fd)
+                raise
+            os.close(fd)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._fd is not None:
+            # Unlinked while still held so that lock files don't pile up
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,280 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, case, delete, extract, func, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .core.logger import app_logger, error_logger
+from .database import SessionLocal
+
+# Maximum number of words kept in the dictionary
+MAX_WORDS = int(os.getenv("MAX_WORDS", "1000"))
+
+# Seconds between two compaction passes (they also run as soon as an insert
+# goes over MAX_WORDS)
+EVICTION_INTERVAL = float(os.getenv("EVICTION_INTERVAL", "300"))
+
+# Maximum number of words deleted per transaction
+EVICTION_BATCH_SIZE = int(os.getenv("EVICTION_BATCH_SIZE", "200"))
+
+# Seconds between two writes of the recorded lookups
+ACCESS_FLUSH_INTERVAL = float(os.getenv("ACCESS_FLUSH_INTERVAL", "30"))
+
+# Hours after which a lookup counts half as much for retention
+HIT_HALF_LIFE_HOURS = float(os.getenv("HIT_HALF_LIFE_HOURS", "72"))
+
+
+def delete_words(db: Session, word_ids: List[int]) -> int:
+    """Delete words with their phonetics, meanings and definitions, in bulk.
+
+    Returns the number of words deleted. The caller commits.
+    """
+    if not word_ids:
+        return 0
+
+    meaning_ids = db.execute(
+        select(models.word_meaning.c.meaning_id).where(models.word_meaning.c.word_id.in_(word_ids))
+    ).scalars().all()
+
+    db.execute(delete(models.word_meaning).where(models.word_meaning.c.word_id.in_(word_ids)))
+    if meaning_ids:
+        # Meanings are not shared between words, but don't delete one that still is
+        still_used = select(models.word_meaning.c.meaning_id).where(models.word_meaning.c.meaning_id.in_(meaning_ids))
+        db.execute(
+            delete(models.Definition)
+            .where(models.Definition.meaning_id.in_(meaning_ids), models.Definition.meaning_id.not_in(still_used))
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(models.Meaning)
+            .where(models.Meaning.id.in_(meaning_ids), models.Meaning.id.not_in(still_used))
+            .execution_options(synchronize_session=False)
+        )
+    db.execute(
+        delete(models.Phonetic)
+        .where(models.Phonetic.word_id.in_(word_ids))
+        .execution_options(synchronize_session=False)
+    )
+    result = db.execute(
+        delete(models.Word)
+        .where(models.Word.id.in_(word_ids))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def delete_orphans(db: Session) -> None:
+    """Delete the rows left behind by word deletions that didn't cascade"""
+    used_meanings = select(models.word_meaning.c.meaning_id).where(models.word_meaning.c.meaning_id.is_not(None))
+    words = select(models.Word.id)
+
+    db.execute(delete(models.word_meaning).where(models.word_meaning.c.word_id.not_in(words)))
+    db.execute(
+        delete(models.Definition)
+        .where(models.Definition.meaning_id.is_(None) | models.Definition.meaning_id.not_in(used_meanings))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(models.Meaning)
+        .where(models.Meaning.id.not_in(used_meanings))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(models.Phonetic)
+        .where(models.Phonetic.word_id.is_(None) | models.Phonetic.word_id.not_in(words))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def age_hours(db: Session, column):
+    """SQL expression of the hours elapsed since column (a UTC timestamp)"""
+    if db.get_bind().dialect.name == "sqlite":
+        age = (func.julianday("now") - func.julianday(column)) * 24
+    else:
+        age = extract("epoch", func.now() - column) / 3600
+    return case((age < 0, 0), else_=age)
+
+
+def hit_score(db: Session):
+    """SQL expression of the lookups, halved every HIT_HALF_LIFE_HOURS since the last one (LFU with aging)"""
+    hits = func.coalesce(models.Word.hit_count, 0)
+    last_accessed = func.coalesce(models.Word.last_accessed, models.Word.created_at)
+    return func.coalesce(hits * func.power(0.5, age_hours(db, last_accessed) / HIT_HALF_LIFE_HOURS), hits)
+
+
+def select_victims(db: Session, count: int) -> List[int]:
+    """IDs of the count words to evict first: the least (recently) looked up ones"""
+    return db.execute(
+        select(models.Word.id)
+        .order_by(hit_score(db), models.Word.id)
+        .limit(count)
+    ).scalars().all()
+
+
+class AccessTracker:
+    """Write-behind counter of word lookups.
+
+    Reads only bump an in-memory counter. flush() adds the counts to the
+    words' hit_count in one batched UPDATE.
+    """
+
+    def __init__(self):
+        self.hits: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    def record(self, word_id: int):
+        with self.lock:
+            self.hits[word_id] = self.hits.get(word_id, 0) + 1
+
+    def flush(self, db: Session) -> int:
+        """Write the recorded lookups, returns the number of words updated"""
+        with self.lock:
+            hits, self.hits = self.hits, {}
+        if not hits:
+            return 0
+
+        stmt = update(models.Word.__table__)\
+            .where(models.Word.__table__.c.id == bindparam("word_id"))\
+            .values(
+                hit_count=func.coalesce(models.Word.__table__.c.hit_count, 0) + bindparam("hits"),
+                last_accessed=func.now(),
+            )
+        try:
+            db.connection().execute(stmt, [{"word_id": k, "hits": v} for k, v in hits.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the counts for the next flush
+            with self.lock:
+                for word_id, n in hits.items():
+                    self.hits[word_id] = self.hits.get(word_id, 0) + n
+            raise
+        return len(hits)
+
+
+class WordStore:
+    """Keeps the dictionary within max_words.
+
+    Inserts only bump an in-process counter. Eviction runs in a background
+    compaction pass, which recounts the words (other workers insert too),
+    deletes the least looked up ones in batches and wakes up early when the
+    counter goes over max_words. The same task flushes the recorded lookups.
+    """
+
+    def __init__(self, max_words: int = MAX_WORDS, interval: float = EVICTION_INTERVAL,
+                 batch_size: int = EVICTION_BATCH_SIZE, flush_interval: float = ACCESS_FLUSH_INTERVAL):
+        self.max_words = max_words
+        self.interval = interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.accesses = AccessTracker()
+        self.count: Optional[int] = None
+        self.lock = threading.Lock()
+        self.orphans_deleted = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def added(self, n: int = 1):
+        """Record inserted words, waking up the compaction if over capacity"""
+        with self.lock:
+            if self.count is not None:
+                self.count += n
+            over = self.count is not None and self.count > self.max_words
+        if over and self._wakeup is not None:
+            self._wakeup.set()
+
+    def removed(self, n: int = 1):
+        with self.lock:
+            if self.count is not None:
+                self.count = max(0, self.count - n)
+
+    def record_access(self, word_id: int):
+        """Record a lookup served from the database"""
+        self.accesses.record(word_id)
+
+    def flush_accesses(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.accesses.flush(db)
+        finally:
+            db.close()
+
+    def compact(self) -> int:
+        """Evict the words over capacity, returns the number of words deleted"""
+        evicted = 0
+        db = SessionLocal()
+        try:
+            if not self.orphans_deleted:
+                delete_orphans(db)
+                db.commit()
+                self.orphans_deleted = True
+
+            count = db.query(func.count(models.Word.id)).scalar()
+            while count > self.max_words:
+                word_ids = select_victims(db, min(count - self.max_words, self.batch_size))
+                if not word_ids:
+                    break
+                deleted = delete_words(db, word_ids)
+                db.commit()
+                evicted += deleted
+                count -= deleted
+                if deleted == 0:
+                    break
+
+            with self.lock:
+                self.count = count
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if evicted:
+            app_logger.info("Evicted words", extra={"evicted": evicted, "count": count})
+        return evicted
+
+    async def run(self):
+        last_compaction = None
+        while True:
+            woken = self._wakeup.is_set()
+            self._wakeup.clear()
+            try:
+                # Flush first so that the eviction sees the latest lookups
+                await asyncio.to_thread(self.flush_accesses)
+                if woken or last_compaction is None or time.monotonic() - last_compaction >= self.interval:
+                    last_compaction = time.monotonic()
+                    await asyncio.to_thread(self.compact)
+            except Exception:
+                error_logger.error("Word compaction failed", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(self.flush_interval, self.interval))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the compaction loop on the running event loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await asyncio.to_thread(self.flush_accesses)
+        except Exception:
+            error_logger.error("Flushing word lookups failed", exc_info=True)
+
+
+# Shared by the application
+word_store = WordStore()
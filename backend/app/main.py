@@ -1,11 +1,18 @@
 import os
 import logging
 from typing import List, Optional, Dict, Any
-import requests
+import base64
+import asyncio
+from contextlib import nullcontext
+from itertools import chain
+import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Form
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Form, Response, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from sqlalchemy import String, func, tuple_, type_coerce
 from sqlalchemy.orm import Session, joinedload
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -14,10 +21,13 @@ from pydantic import BaseModel
 
 # Import logger configuration
 from .core.logger import app_logger, error_logger
+from .core.http_client import http_client
+from .core.single_flight import FileLock, SingleFlight
 
 from . import models, schemas
 
-from .database import SessionLocal, engine
+from .database import SessionLocal, engine, upgrade_schema
+from .eviction import delete_words, word_store
 from .auth import (
     get_current_active_user, 
     authenticate_user, 
@@ -26,6 +36,7 @@ from .auth import (
 )
 
 models.Base.metadata.create_all(bind=engine)
+upgrade_schema(engine, models.Base.metadata)
 
 app = FastAPI()
 
@@ -36,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Request logging middleware
@@ -80,13 +92,17 @@ async def log_requests(request: Request, call_next):
 # LibreTranslate API endpoint (using a public instance, but you might want to set up your own)
 LIBRETRANSLATE_API = os.getenv("LIBRETRANSLATE_API", "http://localhost:5500")
 
-def translate_text(text: str, source_lang: str = "en", target_lang: str = "vi") -> str:
-    """Translate text using LibreTranslate API"""
+# Maximum number of texts sent in a single /translate request.
+# Keep this within the LibreTranslate server's --batch-limit (-1 means no limit)
+LIBRETRANSLATE_BATCH_LIMIT = int(os.getenv("LIBRETRANSLATE_BATCH_LIMIT", "16"))
+
+async def translate_batch(texts: List[str], source_lang: str = "en", target_lang: str = "vi") -> List[str]:
+    """Translate a list of texts with a single LibreTranslate API request"""
     try:
-        response = requests.post(
+        response = await http_client.post(
             f"{LIBRETRANSLATE_API}/translate",
             json={
-                "q": text,
+                "q": texts,
                 "source": source_lang,
                 "target": target_lang,
                 "format": "text"
@@ -94,36 +110,70 @@ def translate_text(text: str, source_lang: str = "en", target_lang: str = "vi")
             headers={"Content-Type": "application/json"}
         )
         response.raise_for_status()
-        return response.json()["translatedText"]
+        translated = response.json()["translatedText"]
+        if len(translated) != len(texts):
+            raise ValueError(f"Expected {len(texts)} translations, got {len(translated)}")
+        return translated
     except Exception as e:
         print(f"Translation error: {str(e)}")
-        return ""  # Return empty string if translation fails
+        return [""] * len(texts)  # Return empty strings if translation fails
+
+async def translate_texts(texts: List[str], source_lang: str = "en", target_lang: str = "vi") -> List[str]:
+    """Translate many texts using as few LibreTranslate API requests as possible.
+
+    Duplicate and empty texts are dropped, the rest is split into chunks of
+    LIBRETRANSLATE_BATCH_LIMIT texts which are sent concurrently (bounded by
+    the shared client's per-host limit). The result list is aligned with the
+    input list.
+    """
+    unique_texts = list(dict.fromkeys(t for t in texts if t))
+    if not unique_texts:
+        return ["" for _ in texts]
+
+    chunk_size = LIBRETRANSLATE_BATCH_LIMIT if LIBRETRANSLATE_BATCH_LIMIT > 0 else len(unique_texts)
+    chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
+
+    results = await asyncio.gather(
+        *(translate_batch(chunk, source_lang, target_lang) for chunk in chunks)
+    )
+
+    translations = dict(zip(unique_texts, chain.from_iterable(results)))
+    return [translations.get(t, "") for t in texts]
+
+async def translate_text(text: str, source_lang: str = "en", target_lang: str = "vi") -> str:
+    """Translate text using LibreTranslate API"""
+    return (await translate_texts([text], source_lang, target_lang))[0]
 
-def add_vietnamese_translations(word_data: Dict[str, Any]) -> Dict[str, Any]:
+async def add_vietnamese_translations(word_data: Dict[str, Any]) -> Dict[str, Any]:
     """Add Vietnamese translations to the word data"""
     if not word_data:
         return word_data
         
     try:
+        # Collect every string to translate as (container, key, text) so that
+        # the whole payload can be translated with batched requests
+        targets = []
+
         # Translate the word itself
         word = word_data.get('word', '')
         if word:
-            word_data['vietnamese'] = {
-                'word': translate_text(word)
-            }
+            word_data['vietnamese'] = {}
+            targets.append((word_data['vietnamese'], 'word', word))
         
         # Translate meanings and examples
-        if 'meanings' in word_data:
-            for meaning in word_data['meanings']:
+        for meaning in word_data.get('meanings', []):
+            for definition in meaning.get('definitions', []):
                 # Translate definition
-                if 'definitions' in meaning:
-                    for definition in meaning['definitions']:
-                        if 'definition' in definition:
-                            definition['vietnamese'] = translate_text(definition['definition'])
-                        
-                        # Translate example if exists
-                        if 'example' in definition:
-                            definition['example_vietnamese'] = translate_text(definition['example'])
+                if 'definition' in definition:
+                    targets.append((definition, 'vietnamese', definition['definition']))
+
+                # Translate example if exists
+                if 'example' in definition:
+                    targets.append((definition, 'example_vietnamese', definition['example']))
+
+        translations = await translate_texts([text for _, _, text in targets])
+        for (container, key, _), translated in zip(targets, translations):
+            container[key] = translated
         
         return word_data
     except Exception as e:
@@ -161,6 +211,20 @@ def create_superuser():
 # Call this function when the application starts
 create_superuser()
 
+@app.on_event("startup")
+async def start_word_compaction():
+    """Keep the dictionary within MAX_WORDS in the background"""
+    word_store.start()
+
+@app.on_event("shutdown")
+async def stop_word_compaction():
+    await word_store.stop()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close pooled connections to the dictionary and translation APIs"""
+    await http_client.aclose()
+
 # Authentication endpoints
 @app.post("/api/token", response_model=schemas.Token)
 async def login_for_access_token(
@@ -237,15 +301,19 @@ async def change_password(
             detail="Failed to update password"
         )
 
-def get_word_from_api(word: str):
+async def get_word_from_api(word: str):
     try:
-        response = requests.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
+        response = await http_client.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
         response.raise_for_status()
-        word_data = response.json()[0]  # Get the first result
+        entries = response.json()
+        if not isinstance(entries, list) or not entries:
+            return None
+        word_data = entries[0]  # Get the first result
         # Add Vietnamese translations
-        word_data = add_vietnamese_translations(word_data)
+        word_data = await add_vietnamese_translations(word_data)
         return word_data
-    except requests.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError: the body was not JSON
         print(f"Error fetching word data: {str(e)}")
         return None
 
@@ -308,10 +376,104 @@ def save_word_to_db(db: Session, word_data: dict, word_lower: str):
         # Add meaning to word's meanings
         db_word.meanings.append(meaning)
     
+    # Store the serialized response along with the rows, in the same transaction
+    db.flush()
+    db.refresh(db_word)
+    db_word.snapshot = schemas.word_snapshot(db_word)
+    db_word.snapshot_version = schemas.WORD_SNAPSHOT_VERSION
+
     db.commit()
     db.refresh(db_word)
     return db_word
 
+def get_word_snapshot(db: Session, *criteria, record_access: bool = False) -> Optional[str]:
+    """
+    Return the serialized WordResponse of the word matching criteria, or None.
+
+    Snapshots missing or written for an older WORD_SNAPSHOT_VERSION are
+    rebuilt from the normalized rows and stored. With record_access, the
+    lookup counts towards keeping the word in the dictionary.
+    """
+    row = db.query(models.Word.id, models.Word.snapshot, models.Word.snapshot_version)\
+            .filter(*criteria)\
+            .first()
+    if row is None:
+        return None
+    if record_access:
+        word_store.record_access(row.id)
+    if row.snapshot is not None and row.snapshot_version == schemas.WORD_SNAPSHOT_VERSION:
+        return row.snapshot
+
+    db_word = db.query(models.Word)\
+               .options(
+                   joinedload(models.Word.phonetics),
+                   joinedload(models.Word.meanings).joinedload(models.Meaning.definitions)
+               )\
+               .filter(models.Word.id == row.id)\
+               .one()
+    snapshot = schemas.word_snapshot(db_word)
+    try:
+        db_word.snapshot = snapshot
+        db_word.snapshot_version = schemas.WORD_SNAPSHOT_VERSION
+        db.commit()
+    except Exception:
+        # Serving the word matters more than storing its snapshot
+        db.rollback()
+    return snapshot
+
+def snapshot_response(snapshot: str, status_code: int = status.HTTP_200_OK) -> Response:
+    """Send a stored snapshot as is, without validating it again"""
+    return Response(content=snapshot, media_type="application/json", status_code=status_code)
+
+# Coalesces concurrent cold lookups of the same word into one pipeline
+word_flights = SingleFlight()
+
+# Directory for per-word lock files. Set it to coordinate cold lookups
+# across uvicorn workers as well (all workers must share the directory)
+WORD_LOCK_DIR = os.getenv("WORD_LOCK_DIR")
+
+async def fetch_and_save_word(word_lower: str) -> Optional[int]:
+    """
+    Fetch a word from the dictionary API, translate it and save it.
+
+    Returns the ID of the saved word, or None if the dictionary doesn't know
+    it. Callers should go through word_flights so that only one pipeline runs
+    per word at a time.
+    """
+    lock = FileLock.for_key(WORD_LOCK_DIR, word_lower) if WORD_LOCK_DIR else nullcontext()
+
+    async with lock:
+        db = SessionLocal()
+        try:
+            # Another worker may have saved the word while we were waiting
+            db_word = db.query(models.Word).filter(models.Word.word == word_lower).first()
+            if db_word:
+                return db_word.id
+
+            word_data = await get_word_from_api(word_lower)
+            if not word_data:
+                return None
+
+            # Ensure the word data includes translations before saving
+            if 'vietnamese' not in word_data:
+                word_data = await add_vietnamese_translations(word_data)
+
+            try:
+                # Save the word and all related data. Words over capacity
+                # are evicted by the background compaction
+                word_id = save_word_to_db(db, word_data, word_lower).id
+                word_store.added()
+                return word_id
+            except Exception:
+                db.rollback()
+                # Try to fetch the word again in case of race condition
+                db_word = db.query(models.Word).filter(models.Word.word == word_lower).first()
+                if db_word:
+                    return db_word.id
+                raise
+        finally:
+            db.close()
+
 @app.post("/api/lookup", response_model=schemas.WordResponse)
 async def lookup_word(
     word: str, 
@@ -322,75 +484,136 @@ async def lookup_word(
     word_lower = word.lower()
     
     # Check if word exists in database
-    db_word = db.query(models.Word).filter(models.Word.word == word_lower).first()
+    snapshot = get_word_snapshot(db, models.Word.word == word_lower, record_access=True)
     
-    if db_word:
+    if snapshot:
         # Return the word data directly since it already contains translations
-        return db_word
+        return snapshot_response(snapshot)
     
     # If not in database, fetch from dictionary API
-    word_data = get_word_from_api(word)
-    if not word_data:
+    try:
+        word_id = await word_flights.do(word_lower, lambda: fetch_and_save_word(word_lower))
+    except Exception:
+        error_logger.error(
+            "Error saving looked up word",
+            exc_info=True,
+            extra={"word": word_lower, "user_id": current_user.id}
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save word to database"
+        )
+
+    snapshot = get_word_snapshot(db, models.Word.id == word_id) if word_id else None
+    if not snapshot:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Word not found in dictionary"
         )
-    
-    # Check if we've reached the word limit
-    word_count = db.query(models.Word).count()
-    if word_count >= 1000:
-        # Delete the oldest word (this will cascade to related records)
-        oldest_word = db.query(models.Word).order_by(models.Word.created_at).first()
-        if oldest_word:
-            db.delete(oldest_word)
-    
-    # Ensure the word data includes translations before saving
-    if 'vietnamese' not in word_data:
-        word_data = add_vietnamese_translations(word_data)
-    
+    return snapshot_response(snapshot)
+
+# created_at as stored (e.g. text on SQLite), so that cursors compare exactly
+# like the values they were taken from
+word_created_at = type_coerce(models.Word.created_at, String)
+
+def encode_cursor(created_at, word_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{word_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
     try:
-        # Save the word and all related data
-        db_word = save_word_to_db(db, word_data, word_lower)
-        return db_word
-    except Exception as e:
-        db.rollback()
-        # Try to fetch the word again in case of race condition
-        db_word = db.query(models.Word).filter(models.Word.word == word_lower).first()
-        if db_word:
-            return db_word
-            
+        created_at, word_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return created_at, int(word_id)
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to save word to database"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
 
-@app.get("/api/words", response_model=list[schemas.WordResponse])
+def get_first_definitions(db: Session, word_ids: List[int]) -> Dict[int, str]:
+    """Return the first definition of each word, in two indexed queries"""
+    first_ids = db.query(func.min(models.Definition.id))\
+                  .join(models.word_meaning, models.word_meaning.c.meaning_id == models.Definition.meaning_id)\
+                  .filter(models.word_meaning.c.word_id.in_(word_ids))\
+                  .group_by(models.word_meaning.c.word_id)
+    rows = db.query(models.word_meaning.c.word_id, models.Definition.definition)\
+             .join(models.word_meaning, models.word_meaning.c.meaning_id == models.Definition.meaning_id)\
+             .filter(models.word_meaning.c.word_id.in_(word_ids), models.Definition.id.in_(first_ids))\
+             .all()
+    return {word_id: definition for word_id, definition in rows}
+
+@app.get("/api/words", response_model=list[schemas.WordResponse], responses={
+    200: {"description": "Full words, or word summaries with fields=summary"}
+})
 async def get_words(
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None, pattern="^summary$"),
     db: Session = Depends(get_db),
     current_user: schemas.UserInDB = Depends(get_current_active_user)
 ):
     """
-    Retrieve a list of saved words with pagination.
+    Retrieve a list of saved words, most recent first.
     
-    - **skip**: Number of items to skip (for pagination)
+    - **cursor**: Value of the X-Next-Cursor header of the previous page
+    - **skip**: Number of items to skip (deprecated, use cursor)
     - **limit**: Maximum number of items to return (for pagination)
+    - **fields**: "summary" to only return the word, its Vietnamese translation and first definition
     """
     try:
-        # Query words with pagination and order by most recent first
-        # Use joined loading to optimize the query and avoid N+1 problem
-        words = db.query(models.Word)\
-                   .options(
-                    joinedload(models.Word.phonetics),
-                    joinedload(models.Word.meanings).joinedload(models.Meaning.definitions)
-                )\
-                .order_by(models.Word.created_at.desc())\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
-        
-        return words
+        # Keyset pagination on (created_at, id): each page is an index range
+        # scan, whatever its depth
+        columns = [models.Word.id, word_created_at.label("cursor_created_at")]
+        if fields == "summary":
+            columns += [models.Word.word, models.Word.vietnamese_word, models.Word.created_at]
+        else:
+            columns += [models.Word.snapshot, models.Word.snapshot_version]
+
+        query = db.query(*columns)
+        if cursor:
+            query = query.filter(tuple_(word_created_at, models.Word.id) < tuple_(*decode_cursor(cursor)))
+        elif skip:
+            query = query.offset(skip)
+        rows = query.order_by(models.Word.created_at.desc(), models.Word.id.desc())\
+                    .limit(limit)\
+                    .all()
+
+        headers = {}
+        if len(rows) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].cursor_created_at, rows[-1].id)
+
+        if fields == "summary":
+            definitions = get_first_definitions(db, [row.id for row in rows])
+            # Returned as is: the response model would validate summaries as full words
+            return JSONResponse(
+                content=jsonable_encoder([
+                    schemas.WordSummary(
+                        id=row.id,
+                        word=row.word,
+                        vietnamese_word=row.vietnamese_word,
+                        definition=definitions.get(row.id),
+                        created_at=row.created_at
+                    )
+                    for row in rows
+                ]),
+                headers=headers
+            )
+
+        # Full words come from their stored snapshots, children are only
+        # loaded for the (rare) words whose snapshot must be rebuilt
+        snapshots = [
+            row.snapshot
+            if row.snapshot is not None and row.snapshot_version == schemas.WORD_SNAPSHOT_VERSION
+            else get_word_snapshot(db, models.Word.id == row.id)
+            for row in rows
+        ]
+        return Response(
+            content="[" + ",".join(snapshots) + "]",
+            media_type="application/json",
+            headers=headers
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         error_logger.error(
             "Error fetching words",
@@ -398,6 +621,7 @@ async def get_words(
             extra={
                 "endpoint": "/api/words/",
                 "user_id": current_user.id,
+                "cursor": cursor,
                 "skip": skip,
                 "limit": limit
             }
@@ -419,21 +643,15 @@ async def get_word(
     - **word_id**: The ID of the word to retrieve
     """
     try:
-        db_word = db.query(models.Word)\
-                   .options(
-                       joinedload(models.Word.phonetics),
-                       joinedload(models.Word.meanings).joinedload(models.Meaning.definitions)
-                   )\
-                   .filter(models.Word.id == word_id)\
-                   .first()
+        snapshot = get_word_snapshot(db, models.Word.id == word_id)
         
-        if not db_word:
+        if not snapshot:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Word not found"
             )
             
-        return db_word
+        return snapshot_response(snapshot)
     except HTTPException:
         raise
     except Exception as e:
@@ -456,13 +674,13 @@ async def create_word(
     """
     try:
         # Check if word already exists
-        db_word = db.query(models.Word).filter(models.Word.word == word.lower()).first()
+        db_word = db.query(models.Word.id).filter(models.Word.word == word.lower()).first()
         if db_word:
             app_logger.info(
                 "Word already exists in database",
                 extra={"word": word.lower(), "word_id": db_word.id, "user_id": current_user.id}
             )
-            return db_word
+            return snapshot_response(get_word_snapshot(db, models.Word.id == db_word.id, record_access=True), status.HTTP_201_CREATED)
             
         # Fetch word data from the API
         app_logger.info(
@@ -470,30 +688,24 @@ async def create_word(
             extra={"word": word.lower(), "user_id": current_user.id}
         )
         
-        word_data = get_word_from_api(word)
-        if not word_data:
+        word_id = await word_flights.do(word.lower(), lambda: fetch_and_save_word(word.lower()))
+        snapshot = get_word_snapshot(db, models.Word.id == word_id) if word_id else None
+        if not snapshot:
             app_logger.warning(
                 "Word not found in external API",
                 extra={"word": word.lower(), "user_id": current_user.id}
             )
             raise HTTPException(status_code=404, detail="Word not found")
-            
-        # Ensure we have Vietnamese translations
-        if 'vietnamese' not in word_data:
-            word_data = add_vietnamese_translations(word_data)
-            
-        # Save the word to the database
-        db_word = save_word_to_db(db, word_data, word.lower())
-        db.commit()
-        db.refresh(db_word)
         
         app_logger.info(
             "Word saved to database",
-            extra={"word": word.lower(), "word_id": db_word.id, "user_id": current_user.id}
+            extra={"word": word.lower(), "word_id": word_id, "user_id": current_user.id}
         )
         
-        return db_word
+        return snapshot_response(snapshot, status.HTTP_201_CREATED)
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         error_logger.error(
@@ -515,24 +727,14 @@ async def delete_word(
     - **word_id**: The ID of the word to delete
     """
     try:
-        # Get the word with all its relationships
-        db_word = db.query(models.Word)\
-                   .options(
-                       joinedload(models.Word.phonetics),
-                       joinedload(models.Word.meanings).joinedload(models.Meaning.definitions)
-                   )\
-                   .filter(models.Word.id == word_id)\
-                   .first()
-                   
-        if not db_word:
+        # Delete the word with its phonetics, meanings and definitions
+        if not delete_words(db, [word_id]):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Word not found"
             )
-        
-        # Delete the word (this will cascade to related records)
-        db.delete(db_word)
         db.commit()
+        word_store.removed()
         
         return None
         
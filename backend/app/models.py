@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func, Boolean, ForeignKey, Table, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, func, Boolean, ForeignKey, Table, JSON, Index
+from sqlalchemy.orm import relationship, deferred
 from .database import Base
 from passlib.context import CryptContext
 
@@ -45,6 +45,10 @@ class Meaning(Base):
 
 class Word(Base):
     __tablename__ = "words"
+    __table_args__ = (
+        # Keyset pagination of the saved words list (newest first)
+        Index("ix_words_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     word = Column(String, unique=True, index=True, nullable=False)
@@ -53,6 +57,15 @@ class Word(Base):
     license_name = Column(String, nullable=True)
     license_url = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Serialized WordResponse (see schemas.word_snapshot), so that reads don't
+    # need the joins. Deferred so that other queries don't load the blob
+    snapshot = deferred(Column(Text, nullable=True))
+    snapshot_version = Column(Integer, nullable=True)
+
+    # Lookups served from the database, recorded in batches (see eviction.AccessTracker)
+    hit_count = Column(Integer, nullable=True, default=1)
+    last_accessed = Column(DateTime(timezone=True), nullable=True, default=func.now())
     
     # Relationships
     phonetics = relationship("Phonetic", backref="word")
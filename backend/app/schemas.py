@@ -63,6 +63,20 @@ class WordResponse(WordBase):
     class Config:
         from_attributes = True
 
+class WordSummary(WordBase):
+    """Lean projection of a word for lists (fields=summary)"""
+    id: int
+    vietnamese_word: Optional[str] = None
+    definition: Optional[str] = None
+    created_at: datetime
+
+# Bump when WordResponse changes, stored snapshots are then rebuilt on read
+WORD_SNAPSHOT_VERSION = 1
+
+def word_snapshot(db_word) -> str:
+    """Serialize a word (with its phonetics and meanings loaded) as WordResponse JSON"""
+    return WordResponse.model_validate(db_word).model_dump_json()
+
 # For backward compatibility with the old API
 class Phonetic(PhoneticBase):
     sourceUrl: Optional[str] = None
@@ -1,5 +1,5 @@
 import os
-from app.database import Base, engine
+from app.database import Base, engine, upgrade_schema
 from app.models import Word, Phonetic, Meaning, Definition, User
 from sqlalchemy.orm import sessionmaker
 from passlib.context import CryptContext
@@ -7,6 +7,7 @@ from passlib.context import CryptContext
 # Create database tables
 print("Creating database tables...")
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine, Base.metadata)
 
 # Create a default admin user
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,75 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import func, select
+
+from app import models
+from app.database import SessionLocal, engine
+from app.eviction import WordStore
+
+MAX_WORDS = 5
+
+
+def seed(db, word, hit_count):
+    meaning = models.Meaning(
+        part_of_speech="noun",
+        definitions=[models.Definition(definition=f"{word} 1"), models.Definition(definition=f"{word} 2")],
+    )
+    db.add(models.Word(
+        word=word,
+        hit_count=hit_count,
+        phonetics=[models.Phonetic(text=f"/{word}/")],
+        meanings=[meaning],
+    ))
+
+
+def count(db, table):
+    return db.execute(select(func.count()).select_from(table)).scalar()
+
+
+def clear(db):
+    for table in reversed(models.Base.metadata.sorted_tables):
+        db.execute(table.delete())
+    db.commit()
+
+
+def setup_function():
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    clear(db)
+    db.close()
+
+
+def teardown_function():
+    db = SessionLocal()
+    clear(db)
+    db.close()
+
+
+def test_compact_evicts_least_looked_up_words():
+    db = SessionLocal()
+    popular = [f"popular{i}" for i in range(MAX_WORDS)]
+    rare = [f"rare{i}" for i in range(3)]
+    for word in popular:
+        seed(db, word, 50)
+    for word in rare:
+        seed(db, word, 1)
+    db.commit()
+
+    store = WordStore(max_words=MAX_WORDS, batch_size=2)
+    assert store.compact() == len(rare)
+
+    words = db.execute(select(models.Word.word)).scalars().all()
+    assert sorted(words) == popular
+
+    # The whole object graph of the evicted words is gone
+    assert count(db, models.Phonetic.__table__) == MAX_WORDS
+    assert count(db, models.word_meaning) == MAX_WORDS
+    assert count(db, models.Meaning.__table__) == MAX_WORDS
+    assert count(db, models.Definition.__table__) == 2 * MAX_WORDS
+    word_ids = select(models.Word.id)
+    meaning_ids = select(models.word_meaning.c.meaning_id)
+    assert db.query(models.Phonetic).filter(models.Phonetic.word_id.not_in(word_ids)).count() == 0
+    assert db.query(models.Definition).filter(models.Definition.meaning_id.not_in(meaning_ids)).count() == 0
+    db.close()
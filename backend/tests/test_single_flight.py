@@ -0,0 +1,24 @@
+import asyncio
+import os
+
+from app.core.single_flight import FileLock
+
+
+def test_file_lock_is_exclusive_and_removed(tmp_path):
+    events = []
+
+    async def hold(name):
+        async with FileLock.for_key(str(tmp_path), "hello", poll_interval=0.01):
+            events.append(f"{name} in")
+            await asyncio.sleep(0.05)
+            events.append(f"{name} out")
+
+    async def main():
+        await asyncio.gather(*(hold(name) for name in "abc"))
+
+    asyncio.run(main())
+
+    # Never two holders at once
+    assert [e.split()[1] for e in events] == ["in", "out"] * 3
+    assert all(events[i].split()[0] == events[i + 1].split()[0] for i in range(0, 6, 2))
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,48 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, models
+from app.auth import get_current_active_user
+from app.database import SessionLocal
+from app.main import app
+
+
+def setup_module():
+    db = SessionLocal()
+    meaning = models.Meaning(part_of_speech="noun", definitions=[models.Definition(definition="A greeting")])
+    db.add(models.Word(word="hello", vietnamese_word="xin chào", meanings=[meaning]))
+    db.commit()
+    db.close()
+    app.dependency_overrides[get_current_active_user] = lambda: models.User(id=1)
+
+
+def teardown_module():
+    app.dependency_overrides.clear()
+
+
+def test_get_words_summary():
+    response = TestClient(app).get("/api/words", params={"fields": "summary"})
+
+    assert response.status_code == 200
+    [word] = response.json()
+    assert word["word"] == "hello"
+    assert word["vietnamese_word"] == "xin chào"
+    assert word["definition"] == "A greeting"
+    assert "meanings" not in word
+
+
+@pytest.mark.parametrize("body", ["<html>Rate limited</html>", "[]"])
+def test_get_word_from_api_not_found(monkeypatch, body):
+    async def get(url):
+        return httpx.Response(200, text=body, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(main.http_client, "get", get)
+
+    assert asyncio.run(main.get_word_from_api("hello")) is None
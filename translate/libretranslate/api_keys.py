@@ -1,9 +1,14 @@
 import os
 import sqlite3
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from expiringdict import ExpiringDict
+from requests.adapters import HTTPAdapter
 
 from libretranslate.default_values import DEFAULT_ARGUMENTS as DEFARGS
 
@@ -87,26 +92,116 @@ class Database:
 
 
 class RemoteDatabase:
-    def __init__(self, url, max_cache_len=1000, max_cache_age=600):
+    """
+    API key lookups against a remote auth service.
+
+    Results are cached: known keys for max_cache_age seconds, unknown keys for
+    negative_cache_age seconds. Known keys are served stale for up to stale_age
+    more seconds while they are refreshed in the background, and for as long
+    as the auth service is unreachable. Failed lookups are not cached.
+    Concurrent lookups of the same key share one request, and requests run in
+    a small worker pool so that a slow auth service cannot tie up every
+    request thread: callers wait at most timeout seconds, and lookups fail
+    fast once max_pending keys are being fetched.
+    """
+
+    def __init__(self, url, max_cache_len=1000, max_cache_age=600, negative_cache_age=60, stale_age=600,
+                 timeout=10, workers=4, max_pending=64):
         self.url = url
-        self.cache = ExpiringDict(max_len=max_cache_len, max_age_seconds=max_cache_age)
+        self.max_cache_len = max_cache_len
+        self.max_cache_age = max_cache_age
+        self.negative_cache_age = negative_cache_age
+        self.stale_age = stale_age
+        self.timeout = timeout
+        self.max_pending = max_pending
+
+        self.cache = OrderedDict() # api_key -> (value or False, expires)
+        self.pending = {}
+        self.lock = threading.RLock()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def lookup(self, api_key):
-        val = self.cache.get(api_key)
-        if val is None:
-            try:
-                r = requests.post(self.url, data={'api_key': api_key}, timeout=60)
-                res = r.json()
-            except Exception as e:
-                print("Cannot authenticate API key: " + str(e))
-                return None
-
-            if res.get('error') is not None:
-                return None
-
-            req_limit = res.get('req_limit', None)
-            char_limit = res.get('char_limit', None)
-
-            self.cache[api_key] = (req_limit, char_limit)
-
+        if not api_key:
+            return None
+
+        with self.lock:
+            entry = self.cache.get(api_key)
+            if entry is not None:
+                self.cache.move_to_end(api_key)
+
+        if entry is not None:
+            val, expires = entry
+            now = time.time()
+            if now < expires:
+                return val or None
+            if val and now < expires + self.stale_age:
+                # Stale while revalidate
+                self.fetch_async(api_key)
+                return val
+
+        future = self.fetch_async(api_key)
+        if future is None:
+            print("Cannot authenticate API key: too many pending lookups")
+            return None
+
+        try:
+            return future.result(timeout=self.timeout) or None
+        except Exception as e:
+            print("Cannot authenticate API key: " + str(e))
+            return None
+
+    def fetch_async(self, api_key):
+        """Returns the future of the (single) in-flight fetch of api_key, or None if overloaded"""
+        with self.lock:
+            future = self.pending.get(api_key)
+            if future is None:
+                if len(self.pending) >= self.max_pending:
+                    return None
+                future = self.executor.submit(self.fetch, api_key)
+                self.pending[api_key] = future
+                future.add_done_callback(lambda f: self.fetch_done(api_key))
+            return future
+
+    def fetch_done(self, api_key):
+        with self.lock:
+            self.pending.pop(api_key, None)
+
+    def store(self, api_key, val, max_age):
+        with self.lock:
+            self.cache[api_key] = (val, time.time() + max_age)
+            self.cache.move_to_end(api_key)
+            while len(self.cache) > self.max_cache_len:
+                self.cache.popitem(last=False)
+
+    def fetch(self, api_key):
+        try:
+            r = self.session.post(self.url, data={'api_key': api_key}, timeout=self.timeout)
+            if r.status_code >= 500:
+                raise Exception("auth service returned HTTP %s" % r.status_code)
+            res = r.json()
+        except Exception as e:
+            print("Cannot authenticate API key: " + str(e))
+
+            # Not a definite miss: keep serving the last known limits, and
+            # let the next lookup try again
+            with self.lock:
+                entry = self.cache.get(api_key)
+            if entry is not None and entry[0]:
+                return entry[0]
+            return False
+
+        if res.get('error') is not None:
+            self.store(api_key, False, self.negative_cache_age)
+            return False
+
+        req_limit = res.get('req_limit', None)
+        char_limit = res.get('char_limit', None)
+        val = (req_limit, char_limit)
+
+        self.store(api_key, val, self.max_cache_age)
         return val
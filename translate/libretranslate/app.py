@@ -1,17 +1,17 @@
-import io
 import math
 import os
 import re
 import tempfile
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, wraps
 from html import unescape
 from timeit import default_timer
+from urllib.parse import quote
 
-import argostranslatefiles
 from argostranslatefiles import get_supported_formats
-from flask import Blueprint, Flask, Response, abort, jsonify, render_template, request, send_file, session, url_for, make_response
+from flask import Blueprint, Flask, Response, abort, g, jsonify, render_template, request, send_file, session, url_for, make_response
 from flask_babel import Babel
 from flask_session import Session
 from flask_swagger import swagger
@@ -21,7 +21,7 @@ from werkzeug.exceptions import HTTPException
 from werkzeug.http import http_date
 from werkzeug.utils import secure_filename
 
-from libretranslate import flood, remove_translated_files, scheduler, secret, security, storage
+from libretranslate import batch, cache, file_translation, flood, health, pairs, remove_translated_files, scheduler, secret, security, storage
 from libretranslate.language import model2iso, iso2model, detect_languages, improve_translation_formatting
 from libretranslate.locales import (
     _,
@@ -106,16 +106,26 @@ def get_fingerprint():
     return request.headers.get("User-Agent", "") + request.headers.get("Cookie", "")
 
 
-def get_req_limits(default_limit, api_keys_db, db_multiplier=1, multiplier=1):
-    req_limit = default_limit
+def get_api_key_limits(api_keys_db):
+    """
+    Returns the (req_limit, char_limit) of the request's API key, or None.
+    The key is resolved once per request.
+    """
+    if not api_keys_db:
+        return None
 
-    if api_keys_db:
+    if "api_key_limits" not in g:
         api_key = get_req_api_key()
+        g.api_key_limits = api_keys_db.lookup(api_key) if api_key else None
+
+    return g.api_key_limits
+
+
+def get_req_limits(default_limit, api_key_limits, db_multiplier=1, multiplier=1):
+    req_limit = default_limit
 
-        if api_key:
-            api_key_limits = api_keys_db.lookup(api_key)
-            if api_key_limits is not None:
-                req_limit = api_key_limits[0] * db_multiplier
+    if api_key_limits is not None:
+        req_limit = api_key_limits[0] * db_multiplier
 
     return int(req_limit * multiplier)
 
@@ -123,14 +133,10 @@ def get_req_limits(default_limit, api_keys_db, db_multiplier=1, multiplier=1):
 def get_char_limit(default_limit, api_keys_db):
     char_limit = default_limit
 
-    if api_keys_db:
-        api_key = get_req_api_key()
-
-        if api_key:
-            api_key_limits = api_keys_db.lookup(api_key)
-            if api_key_limits is not None:
-                if api_key_limits[1] is not None:
-                    char_limit = api_key_limits[1]
+    api_key_limits = get_api_key_limits(api_keys_db)
+    if api_key_limits is not None:
+        if api_key_limits[1] is not None:
+            char_limit = api_key_limits[1]
 
     return char_limit
 
@@ -141,28 +147,31 @@ def get_routes_limits(args, api_keys_db):
         # TODO: better way?
         default_req_limit = 9999999999999
 
-    def minute_limits():
-        return "%s per minute" % get_req_limits(default_req_limit, api_keys_db)
+    hourly_multiplier = int(os.environ.get("LT_HOURLY_REQ_LIMIT_MULTIPLIER", 60))
+    daily_multiplier = int(os.environ.get("LT_DAILY_REQ_LIMIT_MULTIPLIER", 1440))
 
-    def hourly_limits(n):
-        def func():
-          decay = (0.75 ** (n - 1))
-          return "{} per {} hour".format(get_req_limits(args.hourly_req_limit * n, api_keys_db, int(os.environ.get("LT_HOURLY_REQ_LIMIT_MULTIPLIER", 60) * n), decay), n)
-        return func
+    # The limit strings only depend on the API key's req_limit
+    @lru_cache(maxsize=1024)
+    def limits_for(api_key_limits):
+        res = ["%s per minute" % get_req_limits(default_req_limit, api_key_limits)]
 
-    def daily_limits():
-        return "%s per day" % get_req_limits(args.daily_req_limit, api_keys_db, int(os.environ.get("LT_DAILY_REQ_LIMIT_MULTIPLIER", 1440)))
+        if args.hourly_req_limit > 0:
+          for n in range(1, args.hourly_req_limit_decay + 2):
+            decay = (0.75 ** (n - 1))
+            res.append("{} per {} hour".format(get_req_limits(args.hourly_req_limit * n, api_key_limits, hourly_multiplier * n, decay), n))
 
-    res = [minute_limits]
+        if args.daily_req_limit > 0:
+            res.append("%s per day" % get_req_limits(args.daily_req_limit, api_key_limits, daily_multiplier))
 
-    if args.hourly_req_limit > 0:
-      for n in range(1, args.hourly_req_limit_decay + 2):
-        res.append(hourly_limits(n))
+        return res
 
-    if args.daily_req_limit > 0:
-        res.append(daily_limits)
+    def limit(i):
+        def func():
+            api_key_limits = get_api_key_limits(api_keys_db)
+            return limits_for(None if api_key_limits is None else (api_key_limits[0],))[i]
+        return func
 
-    return res
+    return [limit(i) for i in range(len(limits_for(None)))]
 
 def filter_unique(seq, extra):
     seen = set({extra, ""})
@@ -185,23 +194,27 @@ def detect_translatable(src_texts):
 def create_app(args):
     from libretranslate.init import boot
 
-    boot(args.load_only, args.update_models, args.force_update_models)
+    boot(args.load_only, args.update_models, args.force_update_models, not args.disable_warm_up, args.pinned_models)
 
-    from libretranslate.language import load_languages
+    from libretranslate.language import get_detector, get_language_index, load_lang_codes
 
     swagger_url = args.url_prefix + "/docs"  # Swagger UI (w/o trailing '/')
     api_url = args.url_prefix + "/spec"
 
     bp = Blueprint('Main app', __name__)
 
-    storage.setup(args.shared_storage)
+    storage.setup(args.shared_storage, args.shared_storage_cache_ttl)
+    translation_cache = cache.setup(args)
+    pair_scheduler = pairs.setup(args)
 
     if not args.disable_files_translation:
         remove_translated_files.setup(get_upload_dir())
-    languages = load_languages()
-    language_pairs = {}
-    for lang in languages:
-        language_pairs[lang.code] = sorted([l.to_lang.code for l in lang.translations_from])
+        file_translation.setup(get_upload_dir(), args.file_translation_workers, args.file_translation_queue_size)
+    health_state = health.HealthState(None if args.disable_files_translation else get_upload_dir())
+    languages = get_language_index().languages
+
+    # Preload the language detector's n-gram profiles
+    get_detector(load_lang_codes())
 
     # Map userdefined frontend languages to argos language object.
     if args.frontend_language_source == "auto":
@@ -209,10 +222,7 @@ def create_app(args):
             "obj", (object,), {"code": "auto", "name": _("Auto Detect")}
         )
     else:
-        frontend_argos_language_source = next(
-            iter([l for l in languages if l.code == args.frontend_language_source]),
-            None,
-        )
+        frontend_argos_language_source = get_language_index().get_language(args.frontend_language_source)
     if frontend_argos_language_source is None:
         frontend_argos_language_source = languages[0]
 
@@ -222,18 +232,14 @@ def create_app(args):
     if args.frontend_language_target == "locale":
       def resolve_language_locale():
           loc = get_locale()
-          language_target = next(
-              iter([l for l in languages if l.code == loc]), None
-          )
+          language_target = get_language_index().get_language(loc)
           if language_target is None:
             language_target = language_target_fallback
           return language_target
 
       frontend_argos_language_target = resolve_language_locale
     else:
-      language_target = next(
-          iter([l for l in languages if l.code == args.frontend_language_target]), None
-      )
+      language_target = get_language_index().get_language(args.frontend_language_target)
       if language_target is None:
         language_target = language_target_fallback
       frontend_argos_language_target = lambda: language_target
@@ -300,7 +306,7 @@ def create_app(args):
             os.mkdir(default_mp_dir)
           os.environ["PROMETHEUS_MULTIPROC_DIR"] = default_mp_dir
 
-      from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Summary, generate_latest, multiprocess
+      from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Summary, generate_latest, multiprocess
 
       @bp.route("/metrics")
       @limiter.exempt
@@ -320,24 +326,70 @@ def create_app(args):
       gauge_request = Gauge('libretranslate_http_requests_in_flight', 'Active requests', ['endpoint', 'request_ip', 'api_key'], multiprocess_mode='livesum')
       gauge_request.labels('/translate', '127.0.0.1', '')
 
+      if translation_cache is not None:
+        cache_lookups = Counter('libretranslate_translation_cache_lookups_total', 'Translation cache lookups', ['result'])
+        translation_cache.on_lookup = lambda result: cache_lookups.labels(result).inc()
+
+      if isinstance(storage.get_storage(), storage.MemoryStorage):
+        gauge_storage_keys = Gauge('libretranslate_storage_keys', 'Keys in the in-memory shared storage', multiprocess_mode='livesum')
+        gauge_storage_bytes = Gauge('libretranslate_storage_bytes', 'Estimated memory used by the in-memory shared storage', multiprocess_mode='livesum')
+
+        def update_storage_stats(stats):
+          gauge_storage_keys.set(stats["keys"])
+          gauge_storage_bytes.set(stats["bytes"])
+
+        storage.get_storage().on_sweep = update_storage_stats
+
+    def load_access_state(ip):
+        """
+        Fetch the stored values the access checks may need in one storage
+        round trip. For requests without an API key, the fingerprint is
+        registered for the IP if missing.
+        """
+        b = storage.get_storage().batch()
+        ops = {}
+
+        if flood.active:
+            ops["offences"] = b.get_hash_int("banned", ip)
+
+        if args.api_keys and args.require_api_key_secret:
+            ops["secret_0"] = b.get_str("secret_0")
+            ops["secret_1"] = b.get_str("secret_1")
+            ops["bogus_secret"] = b.get_str("secret_bogus")
+
+        fingerprint = get_fingerprint()
+        if args.api_keys and args.require_api_key_fingerprint and not get_req_api_key() and flood.valid_fingerprint(fingerprint):
+            ops["fingerprint"] = b.get_or_set_str(flood.fingerprint_key(ip), fingerprint, ex=300)
+
+        if not ops:
+            return {}
+
+        results = b.execute()
+        state = {name: results[i] for name, i in ops.items()}
+        if "secret_0" in state:
+            state["secrets"] = [state.pop("secret_0"), state.pop("secret_1")]
+        return state
+
     def access_check(f):
         @wraps(f)
         def func(*a, **kw):
             ip = get_remote_address()
+            state = load_access_state(ip)
 
-            if flood.is_banned(ip):
+            if flood.is_banned(ip, state.get("offences")):
                 abort(403, description=_("Too many request limits violations"))
 
             if args.api_keys:
                 ak = get_req_api_key()
-                if ak and api_keys_db.lookup(ak) is None:
+                api_key_limits = get_api_key_limits(api_keys_db)
+                if ak and api_key_limits is None:
                     abort(
                         403,
                         description=_("Invalid API key"),
                     )
                 else:
                   need_key = False
-                  key_missing = api_keys_db.lookup(ak) is None
+                  key_missing = api_key_limits is None
 
                   if (args.require_api_key_origin
                       and key_missing
@@ -348,11 +400,11 @@ def create_app(args):
                   req_secret = get_req_secret()
                   if (args.require_api_key_secret
                     and key_missing
-                    and not secret.secret_match(req_secret)
+                    and not secret.secret_match(req_secret, state.get("secrets"))
                   ):
                     need_key = True
 
-                    if secret.secret_bogus_match(req_secret):
+                    if secret.secret_bogus_match(req_secret, state.get("bogus_secret")):
                       abort(make_response(jsonify({
                         'translatedText': secret.get_emoji(),
                         'alternatives': [],
@@ -361,7 +413,7 @@ def create_app(args):
                   
                   if (args.require_api_key_fingerprint
                     and key_missing):
-                    if flood.fingerprint_mismatch(ip, get_fingerprint()):
+                    if flood.fingerprint_mismatch(ip, get_fingerprint(), state.get("fingerprint")):
                       need_key = True
 
                   if args.under_attack and key_missing:
@@ -406,6 +458,83 @@ def create_app(args):
               request.duration = max(default_timer() - start_t, 0)
           return time_func
 
+    @contextmanager
+    def translation_slot(src_lang, tgt_lang, translator):
+        """Run translation work in the language pair's worker slots, or reply 429 if the pair is saturated"""
+        try:
+            token = pair_scheduler.acquire(src_lang.code, tgt_lang.code, translator)
+        except pairs.PairBusyError:
+            abort(make_response(jsonify({
+                "error": _("Slowdown:") + " " + _("%(sname)s (%(scode)s) to %(tname)s (%(tcode)s) translations are busy, try again later", sname=_lazy(src_lang.name), scode=src_lang.code, tname=_lazy(tgt_lang.name), tcode=tgt_lang.code)
+            }), 429, {"Retry-After": str(args.pair_retry_after)}))
+
+        try:
+            yield
+        finally:
+            pair_scheduler.release(token)
+
+    def translate_text(translator, src_lang, tgt_lang, text, text_format, num_alternatives):
+        """
+        Translate a single text, going through the translation cache.
+        Returns a (translated_text, alternatives) tuple.
+        """
+        key = None
+        if translation_cache is not None:
+            key = translation_cache.key(src_lang.code, tgt_lang.code, text_format, num_alternatives, text)
+            cached = translation_cache.get(key)
+            if cached is not None:
+                return cached
+
+        if text_format == "html":
+            translated_text = unescape(str(translate_html(translator, text)))
+            alternatives = [] # Not supported for html yet
+        else:
+            hypotheses = translator.hypotheses(text, num_alternatives + 1)
+            translated_text = unescape(improve_translation_formatting(text, hypotheses[0].value))
+            alternatives = filter_unique([unescape(improve_translation_formatting(text, hypotheses[i].value)) for i in range(1, len(hypotheses))], translated_text)
+
+        if key is not None:
+            translation_cache.set(key, translated_text, alternatives)
+
+        return translated_text, alternatives
+
+    def translate_texts(translator, src_lang, tgt_lang, texts, text_format, num_alternatives):
+        """
+        Translate a list of texts, going through the translation cache and
+        running all the uncached texts through the model in batches when possible.
+        Returns a list of (translated_text, alternatives) tuples.
+        """
+        package_translation = batch.get_package_translation(translator) if text_format == "text" else None
+        if package_translation is None or args.batch_token_budget <= 0:
+            return [translate_text(translator, src_lang, tgt_lang, text, text_format, num_alternatives) for text in texts]
+
+        results = {}
+        keys = {}
+        for text in texts:
+            if text in results or text in keys:
+                continue
+            if translation_cache is not None:
+                key = translation_cache.key(src_lang.code, tgt_lang.code, text_format, num_alternatives, text)
+                cached = translation_cache.get(key)
+                if cached is not None:
+                    results[text] = cached
+                    continue
+                keys[text] = key
+            else:
+                keys[text] = None
+
+        pending = list(keys)
+        if pending:
+            hypotheses = batch.translate_batch(package_translation, pending, num_alternatives + 1, args.batch_token_budget)
+            for text, values in zip(pending, hypotheses):
+                translated_text = unescape(improve_translation_formatting(text, values[0]))
+                alternatives = filter_unique([unescape(improve_translation_formatting(text, v)) for v in values[1:]], translated_text)
+                results[text] = (translated_text, alternatives)
+                if keys[text] is not None:
+                    translation_cache.set(keys[text], translated_text, alternatives)
+
+        return [results[text] for text in texts]
+
     @bp.errorhandler(400)
     def invalid_api(e):
         return jsonify({"error": str(e.description)}), 400
@@ -485,6 +614,66 @@ def create_app(args):
 
       return response
 
+    @bp.get("/health/live")
+    @limiter.exempt
+    def health_live():
+        """
+        Check that the server is running
+        ---
+        tags:
+          - health
+        responses:
+          200:
+            description: The server is running
+            schema:
+              id: health-live
+              type: object
+              properties:
+                status:
+                  type: string
+                  description: Always "ok"
+        """
+        return jsonify({"status": "ok"})
+
+    @bp.get("/health/ready")
+    @limiter.exempt
+    def health_ready():
+        """
+        Check that the server is ready to translate, without running a translation
+        ---
+        tags:
+          - health
+        responses:
+          200:
+            description: The server is ready
+            schema:
+              id: health-ready
+              type: object
+              properties:
+                status:
+                  type: string
+                  enum: [ready, unavailable]
+                  description: Readiness status
+                checks:
+                  type: object
+                  description: Model load state, queue depths, shared storage and upload directory checks
+          503:
+            description: The server is not ready
+            schema:
+              id: health-ready
+              type: object
+              properties:
+                status:
+                  type: string
+                  enum: [ready, unavailable]
+                  description: Readiness status
+                checks:
+                  type: object
+                  description: Model load state, queue depths, shared storage and upload directory checks
+        """
+        ready, checks = health_state.status()
+        return jsonify({"status": "ready" if ready else "unavailable", "checks": checks}), 200 if ready else 503
+
     @bp.get("/languages")
     @limiter.exempt
     def langs():
@@ -514,10 +703,11 @@ def create_app(args):
                       type: string
                     description: Supported target language codes
         """
+        index = get_language_index()
         return jsonify([{"code": model2iso(l.code), 
                          "name": _lazy(l.name), 
-                         "targets": model2iso(language_pairs.get(l.code, []))
-                        } for l in languages])
+                         "targets": model2iso(index.pairs.get(l.code, []))
+                        } for l in index.languages])
 
     # Add cors
     @bp.after_request
@@ -711,12 +901,13 @@ def create_app(args):
         else:
           detected_src_lang = {"confidence": 0.0, "language": "en"}
         
-        src_lang = next(iter([l for l in languages if l.code == detected_src_lang["language"]]), None)
+        index = get_language_index()
+        src_lang = index.get_language(detected_src_lang["language"])
 
         if src_lang is None:
             abort(400, description=_("%(lang)s is not supported", lang=source_lang))
 
-        tgt_lang = next(iter([l for l in languages if l.code == target_lang]), None)
+        tgt_lang = index.get_language(target_lang)
 
         if tgt_lang is None:
             abort(400, description=_("%(lang)s is not supported",lang=target_lang))
@@ -729,28 +920,19 @@ def create_app(args):
 
         try:
             if batch:
-                batch_results = []
-                batch_alternatives = []
-                for text in q:
-                    translator = src_lang.get_translation(tgt_lang)
-                    if translator is None:
-                        abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
-
-                    if translatable:
-                      if text_format == "html":
-                          translated_text = unescape(str(translate_html(translator, text)))
-                          alternatives = [] # Not supported for html yet
-                      else:
-                          hypotheses = translator.hypotheses(text, num_alternatives + 1)
-                          translated_text = unescape(improve_translation_formatting(text, hypotheses[0].value))
-                          alternatives = filter_unique([unescape(improve_translation_formatting(text, hypotheses[i].value)) for i in range(1, len(hypotheses))], translated_text)
-                    else:
-                      translated_text = text # Cannot translate, send the original text back
-                      alternatives = []
-                    
-                    batch_results.append(translated_text)
-                    batch_alternatives.append(alternatives)
-                
+                translator = index.get_translation(src_lang.code, tgt_lang.code)
+                if translator is None:
+                    abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
+
+                if translatable:
+                  with translation_slot(src_lang, tgt_lang, translator):
+                    translations = translate_texts(translator, src_lang, tgt_lang, q, text_format, num_alternatives)
+                else:
+                  translations = [(text, []) for text in q] # Cannot translate, send the original texts back
+
+                batch_results = [t[0] for t in translations]
+                batch_alternatives = [t[1] for t in translations]
+
                 result = {"translatedText": batch_results}
 
                 if source_lang == "auto":
@@ -760,18 +942,13 @@ def create_app(args):
 
                 return jsonify(result)
             else:
-                translator = src_lang.get_translation(tgt_lang)
+                translator = index.get_translation(src_lang.code, tgt_lang.code)
                 if translator is None:
                     abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
 
                 if translatable:
-                  if text_format == "html":
-                      translated_text = unescape(str(translate_html(translator, q)))
-                      alternatives = [] # Not supported for html yet
-                  else:
-                      hypotheses = translator.hypotheses(q, num_alternatives + 1)
-                      translated_text = unescape(improve_translation_formatting(q, hypotheses[0].value))
-                      alternatives = filter_unique([unescape(improve_translation_formatting(q, hypotheses[i].value)) for i in range(1, len(hypotheses))], translated_text)
+                  with translation_slot(src_lang, tgt_lang, translator):
+                    translated_text, alternatives = translate_text(translator, src_lang, tgt_lang, q, text_format, num_alternatives)
                 else:
                   translated_text = q # Cannot translate, send the original text back
                   alternatives = []
@@ -818,6 +995,16 @@ def create_app(args):
               example: es
             required: true
             description: Target language code
+          - in: formData
+            name: async
+            schema:
+              type: boolean
+              default: false
+              example: true
+            required: false
+            description: >
+              Queue the translation and return a job ID right away.
+              Poll /translate_file/{job_id} until translatedFileUrl is set
           - in: formData
             name: api_key
             schema:
@@ -832,9 +1019,24 @@ def create_app(args):
               id: translate-file
               type: object
               properties:
+                jobId:
+                  type: string
+                  description: File translation job ID
                 translatedFileUrl:
                   type: string
                   description: Translated file url
+          202:
+            description: File translation queued (async mode)
+            schema:
+              id: translate-file-queued
+              type: object
+              properties:
+                jobId:
+                  type: string
+                  description: File translation job ID
+                statusUrl:
+                  type: string
+                  description: File translation status url
           400:
             description: Invalid request
             schema:
@@ -877,6 +1079,7 @@ def create_app(args):
 
         source_lang = iso2model(request.form.get("source"))
         target_lang = iso2model(request.form.get("target"))
+        run_async = request.form.get("async", "false").lower() in ["1", "true"] and args.file_translation_workers > 0
         file = request.files['file']
         char_limit = get_char_limit(args.char_limit, api_keys_db)
 
@@ -893,18 +1096,20 @@ def create_app(args):
         if os.path.splitext(file.filename)[1] not in frontend_argos_supported_files_format:
             abort(400, description=_("Invalid request: file format not supported"))
 
-        src_lang = next(iter([l for l in languages if l.code == source_lang]), None)
+        index = get_language_index()
+        src_lang = index.get_language(source_lang)
 
         if src_lang is None and source_lang != "auto":
             abort(400, description=_("%(lang)s is not supported", lang=source_lang))
 
-        tgt_lang = next(iter([l for l in languages if l.code == target_lang]), None)
+        tgt_lang = index.get_language(target_lang)
 
         if tgt_lang is None:
             abort(400, description=_("%(lang)s is not supported", lang=target_lang))
 
         try:
-            filename = str(uuid.uuid4()) + '.' + secure_filename(file.filename)
+            job_id = str(uuid.uuid4())
+            filename = job_id + '.' + secure_filename(file.filename)
             filepath = os.path.join(get_upload_dir(), filename)
 
             file.save(filepath)
@@ -918,24 +1123,106 @@ def create_app(args):
                 request.req_cost = max(1, int(os.path.getsize(filepath) / char_limit))
 
             if source_lang == "auto":
-                src_texts = argostranslatefiles.get_texts(filepath)
+                src_texts = file_translation.read_sample(filepath)
                 candidate_langs = detect_languages(src_texts)
                 detected_src_lang = candidate_langs[0]
-                src_lang = next(iter([l for l in languages if l.code == detected_src_lang["language"]]), None)
+                src_lang = index.get_language(detected_src_lang["language"])
                 if src_lang is None:
                     abort(400, description=_("%(lang)s is not supported", lang=detected_src_lang["language"]))
 
-            translated_file_path = argostranslatefiles.translate_file(src_lang.get_translation(tgt_lang), filepath)
-            translated_filename = os.path.basename(translated_file_path)
+            translator = index.get_translation(src_lang.code, tgt_lang.code)
+            if translator is None:
+                os.remove(filepath)
+                abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
+
+            if run_async:
+                if not file_translation.submit(src_lang.code, tgt_lang.code, filepath, job_id, args.file_chunk_size):
+                    os.remove(filepath)
+                    return jsonify({"error": _("Too many file translations in progress, try again later")}), 503
+
+                return jsonify(
+                    {
+                        "jobId": job_id,
+                        "statusUrl": url_for('Main app.translate_file_status', job_id=job_id, _external=True)
+                    }
+                ), 202
+
+            with translation_slot(src_lang, tgt_lang, translator):
+                translated_filename = file_translation.run(translator, filepath, job_id, args.file_chunk_size)
 
             return jsonify(
                 {
+                    "jobId": job_id,
                     "translatedFileUrl": url_for('Main app.download_file', filename=translated_filename, _external=True)
                 }
             )
+        except HTTPException as e:
+            raise e
         except Exception as e:
             abort(500, description=e)
 
+    @bp.get("/translate_file/<string:job_id>")
+    @limiter.exempt
+    def translate_file_status(job_id: str):
+        """
+        Retrieve the progress of a file translation
+        ---
+        tags:
+          - translate
+        parameters:
+          - in: path
+            name: job_id
+            schema:
+              type: string
+              example: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
+            required: true
+            description: File translation job ID
+        responses:
+          200:
+            description: File translation progress
+            schema:
+              id: translate-file-status
+              type: object
+              properties:
+                status:
+                  type: string
+                  enum: [queued, running, done, error]
+                  description: Job status
+                progress:
+                  type: number
+                  description: Percentage of the file translated (null when it cannot be estimated)
+                translatedCharacters:
+                  type: integer
+                  description: Number of characters translated so far
+                translatedFileUrl:
+                  type: string
+                  description: Translated file url (when done)
+                error:
+                  type: string
+                  description: Error message (on error)
+          404:
+            description: Unknown job
+            schema:
+              id: error-response
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Error message
+        """
+        if args.disable_files_translation:
+            abort(403, description=_("Files translation are disabled on this server."))
+
+        progress = file_translation.get_progress(job_id)
+        if progress is None:
+            return jsonify({"error": _("Not found")}), 404
+
+        filename = progress.pop("filename", None)
+        if filename is not None:
+            progress["translatedFileUrl"] = url_for('Main app.download_file', filename=filename, _external=True)
+
+        return jsonify(progress)
+
     @bp.get("/download_file/<string:filename>")
     def download_file(filename: str):
         """
@@ -946,22 +1233,26 @@ def create_app(args):
 
         filepath = os.path.join(get_upload_dir(), filename)
         try:
-            checked_filepath = security.path_traversal_check(filepath, get_upload_dir())
-            if os.path.isfile(checked_filepath):
-                filepath = checked_filepath
+            filepath = security.path_traversal_check(filepath, get_upload_dir())
         except security.SuspiciousFileOperationError:
             abort(400, description=_("Invalid filename"))
 
-        return_data = io.BytesIO()
-        with open(filepath, 'rb') as fo:
-            return_data.write(fo.read())
-        return_data.seek(0)
+        if not os.path.isfile(filepath):
+            return jsonify({"error": _("Not found")}), 404
 
         download_filename = filename.split('.')
         download_filename.pop(0)
         download_filename = '.'.join(download_filename)
 
-        return send_file(return_data, as_attachment=True, download_name=download_filename)
+        # Stream from disk (or let the front server do it); send_file
+        # handles ETag, Last-Modified and Range requests
+        response = send_file(filepath, as_attachment=True, download_name=download_filename, max_age=0)
+
+        if args.x_accel_redirect:
+            del response.headers["X-Sendfile"]
+            response.headers["X-Accel-Redirect"] = args.x_accel_redirect.rstrip('/') + '/' + quote(os.path.basename(filepath))
+
+        return response
 
     @bp.post("/detect")
     @access_check
@@ -1223,6 +1514,7 @@ def create_app(args):
     app.config["SESSION_TYPE"] = "filesystem"
     app.config["SESSION_FILE_DIR"] = os.path.join("db", "sessions")
     app.config["JSON_AS_ASCII"] = False
+    app.config["USE_X_SENDFILE"] = args.x_sendfile or bool(args.x_accel_redirect)
     Session(app)
 
     if args.debug:
@@ -0,0 +1,126 @@
+import threading
+
+from argostranslate import settings
+from argostranslate.translate import ITranslation
+
+sentencizers = {}
+sentencizer_lock = threading.Lock()
+
+
+def get_package_translation(translator):
+    """
+    Returns the argostranslate translation backed directly by a single
+    package model (unwrapping cached translations), or None for pivot,
+    identity or otherwise non-batchable translations
+    """
+    while translator is not None and hasattr(translator, "underlying"):
+        translator = translator.underlying
+
+    pkg = getattr(translator, "pkg", None)
+    if pkg is None or not hasattr(translator, "translator") or getattr(pkg, "type", "translate") == "sbd":
+        return None
+    # Without stanza, argostranslate splits sentences with an sbd model,
+    # one inference per sentence: leave those to PackageTranslation
+    if not settings.stanza_available or not (pkg.package_path / "model").is_dir():
+        return None
+
+    return translator
+
+
+def get_model(translation):
+    # Share the model with PackageTranslation.hypotheses
+    if translation.translator is None:
+        import ctranslate2
+
+        translation.translator = ctranslate2.Translator(str(translation.pkg.package_path / "model"), device=settings.device)
+    return translation.translator
+
+
+def get_sentencizer(pkg):
+    """The stanza pipeline of apply_packaged_translation, loaded once per package"""
+    key = str(pkg.package_path)
+    with sentencizer_lock:
+        sentencizer = sentencizers.get(key)
+        if sentencizer is None:
+            import stanza
+
+            sentencizer = stanza.Pipeline(
+                lang=pkg.from_code,
+                dir=str(pkg.package_path / "stanza"),
+                processors="tokenize",
+                use_gpu=settings.device == "cuda",
+                logging_level="WARNING",
+            )
+            sentencizers[key] = sentencizer
+    return sentencizer
+
+
+def split_sentences(pkg, paragraph):
+    """Sentences of a paragraph, as apply_packaged_translation splits them"""
+    return [sentence.text for sentence in get_sentencizer(pkg)(paragraph).sentences]
+
+
+def combine_paragraphs(paragraphs):
+    """Joins translated paragraphs like PackageTranslation.hypotheses does"""
+    value = ""
+    for paragraph in paragraphs:
+        value = ITranslation.combine_paragraphs([value, paragraph])
+    return value.lstrip("\n")
+
+
+def translate_batch(translation, texts, num_hypotheses, token_budget):
+    """
+    Translate a list of texts through a package translation (see get_package_translation)
+    with batched inference. Identical sentences are translated once.
+    Texts are split, tokenized and reassembled exactly as PackageTranslation.hypotheses
+    does, so that both paths give the same translations (and can share cache entries).
+    Returns, for each text, a list of num_hypotheses translated strings.
+    """
+    pkg = translation.pkg
+
+    # Sentence-split all inputs and collect the unique segments
+    structure = [
+        [split_sentences(pkg, paragraph) for paragraph in ITranslation.split_into_paragraphs(text)]
+        for text in texts
+    ]
+    segment_index = {}
+    for paragraphs in structure:
+        for sentences in paragraphs:
+            for sentence in sentences:
+                if sentence not in segment_index:
+                    segment_index[sentence] = len(segment_index)
+
+    segments = list(segment_index)
+    translated = []
+    if segments:
+        tokenized = [pkg.tokenizer.encode(segment) for segment in segments]
+        results = get_model(translation).translate_batch(
+            tokenized,
+            target_prefix=[[pkg.target_prefix]] * len(tokenized) if pkg.target_prefix != "" else None,
+            replace_unknowns=True,
+            max_batch_size=token_budget,
+            batch_type="tokens",
+            beam_size=max(num_hypotheses, 4),
+            num_hypotheses=num_hypotheses,
+            length_penalty=0.2,
+        )
+        translated = [result.hypotheses for result in results]
+
+    def decode(sentences, i):
+        # Paragraphs are decoded as a whole, as in apply_packaged_translation
+        tokens = []
+        for s in sentences:
+            hypotheses = translated[segment_index[s]]
+            tokens += hypotheses[min(i, len(hypotheses) - 1)]
+        value = pkg.tokenizer.decode(tokens)
+        if pkg.target_prefix != "" and value.startswith(pkg.target_prefix):
+            value = value[len(pkg.target_prefix):]
+        if len(value) > 0 and value[0] == " ":
+            value = value[1:]
+        return value
+
+    # Reassemble the per-input results
+    return [
+        [combine_paragraphs([decode(sentences, i) for sentences in paragraphs]) for i in range(num_hypotheses)]
+        for paragraphs in structure
+    ]
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from libretranslate.storage import RedisStorage
+
+translation_cache = None
+pending_invalidation = False
+
+def get_cache():
+    return translation_cache
+
+
+def get_models_version():
+    """Fingerprint of the installed language model packages"""
+    from argostranslate import package
+
+    packages = sorted(f"{p.from_code}-{p.to_code}@{p.package_version}" for p in package.get_installed_packages())
+    return hashlib.sha1(",".join(packages).encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_text(text):
+    return unicodedata.normalize("NFC", text.replace("\r\n", "\n"))
+
+
+class MemoryTier:
+    """Thread-safe LRU with a maximum number of entries and a maximum age"""
+
+    def __init__(self, max_len, max_age):
+        self.max_len = max_len
+        self.max_age = max_age
+        self.store = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.store.get(key)
+            if item is None:
+                return None
+
+            value, created = item
+            if self.max_age > 0 and created + self.max_age <= time.time():
+                del self.store[key]
+                return None
+
+            self.store.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.store[key] = (value, time.time())
+            self.store.move_to_end(key)
+            while len(self.store) > self.max_len:
+                self.store.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.store.clear()
+
+    def __len__(self):
+        return len(self.store)
+
+
+class SQLiteTier:
+    """Persistent tier stored in a SQLite database, shared by all the processes of a host"""
+
+    # Run the size/age eviction every N writes
+    evict_interval = 100
+
+    def __init__(self, db_path, max_len, max_age):
+        db_dir = os.path.dirname(db_path)
+        if db_dir != '' and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.max_len = max_len
+        self.max_age = max_age
+        self.writes = 0
+        self.lock = threading.Lock()
+
+        self.c = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.c.execute("PRAGMA journal_mode=WAL")
+        self.c.execute("PRAGMA synchronous=NORMAL")
+        self.c.execute(
+            """CREATE TABLE IF NOT EXISTS translation_cache (
+            "key"	TEXT NOT NULL,
+            "value"	TEXT NOT NULL,
+            "created"	REAL NOT NULL,
+            PRIMARY KEY("key")
+        );"""
+        )
+        self.c.execute('CREATE INDEX IF NOT EXISTS translation_cache_created ON translation_cache ("created");')
+        self.c.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.c.execute("SELECT value, created FROM translation_cache WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            return None
+        if self.max_age > 0 and row[1] + self.max_age <= time.time():
+            return None
+        return row[0]
+
+    def set(self, key, value):
+        with self.lock:
+            self.c.execute(
+                "INSERT OR REPLACE INTO translation_cache (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self.c.commit()
+
+            self.writes += 1
+            if self.writes % self.evict_interval == 0:
+                self._evict()
+
+    def _evict(self):
+        if self.max_age > 0:
+            self.c.execute("DELETE FROM translation_cache WHERE created <= ?", (time.time() - self.max_age,))
+        if self.max_len > 0:
+            self.c.execute(
+                "DELETE FROM translation_cache WHERE key IN "
+                "(SELECT key FROM translation_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_len,),
+            )
+        self.c.commit()
+
+    def clear(self):
+        with self.lock:
+            self.c.execute("DELETE FROM translation_cache")
+            self.c.commit()
+
+
+class StorageTier:
+    """Persistent tier stored in a Redis instance (size eviction is left to Redis' maxmemory-policy)"""
+
+    prefix = "translation_cache:"
+
+    def __init__(self, storage, max_age):
+        self.storage = storage
+        self.max_age = max_age
+
+    def get(self, key):
+        value = self.storage.get_str(self.prefix + key)
+        return value if value != "" else None
+
+    def set(self, key, value):
+        self.storage.set_str(self.prefix + key, value, ex=self.max_age if self.max_age > 0 else None)
+
+    def clear(self):
+        # Keys embed the models version, so entries for updated
+        # models are never hit again and expire on their own
+        pass
+
+
+class TranslationCache:
+    """
+    Content-addressed cache of translation results.
+
+    Entries are keyed by (source, target, format, alternatives, normalized text,
+    models version) and kept in an in-memory LRU in front of an optional
+    persistent tier.
+    """
+
+    def __init__(self, memory, persistent=None):
+        self.memory = memory
+        self.persistent = persistent
+        self.models_version = get_models_version()
+        self.on_lookup = None # Callback receiving "memory", "persistent" or "miss"
+        self.stats = {"memory": 0, "persistent": 0, "miss": 0}
+
+    def key(self, source, target, text_format, num_alternatives, text):
+        h = hashlib.sha256()
+        for part in (self.models_version, source, target, text_format, str(num_alternatives)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        h.update(normalize_text(text).encode("utf-8"))
+        return h.hexdigest()
+
+    def _record(self, result):
+        self.stats[result] += 1
+        if self.on_lookup is not None:
+            self.on_lookup(result)
+
+    def get(self, key):
+        """Returns (translated_text, alternatives) or None"""
+        value = self.memory.get(key)
+        if value is not None:
+            self._record("memory")
+            return value
+
+        if self.persistent is not None:
+            raw = self.persistent.get(key)
+            if raw is not None:
+                data = json.loads(raw)
+                value = (data["t"], data["a"])
+                self.memory.set(key, value)
+                self._record("persistent")
+                return value
+
+        self._record("miss")
+        return None
+
+    def set(self, key, translated_text, alternatives):
+        value = (translated_text, list(alternatives))
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, json.dumps({"t": value[0], "a": value[1]}, ensure_ascii=False))
+
+    def clear(self):
+        self.models_version = get_models_version()
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+
+def invalidate():
+    """Drop all cached translations (call after installing or updating models)"""
+    global pending_invalidation
+
+    if translation_cache is not None:
+        translation_cache.clear()
+    else:
+        # Models can be updated at boot, before the cache is set up
+        pending_invalidation = True
+
+
+def setup(args):
+    global translation_cache
+    global pending_invalidation
+
+    if args.translation_cache_size <= 0:
+        translation_cache = None
+        return translation_cache
+
+    max_age = args.translation_cache_age
+    storage_uri = args.translation_cache_storage
+
+    if storage_uri.startswith("memory://"):
+        persistent = None
+    elif storage_uri.startswith("sqlite://"):
+        persistent = SQLiteTier(storage_uri[len("sqlite://"):], args.translation_cache_persistent_size, max_age)
+    elif storage_uri.startswith("redis://"):
+        persistent = StorageTier(RedisStorage(storage_uri), max_age)
+    else:
+        raise Exception("Invalid translation cache storage URI: " + storage_uri)
+
+    translation_cache = TranslationCache(MemoryTier(args.translation_cache_size, max_age), persistent)
+
+    if pending_invalidation:
+        translation_cache.clear()
+        pending_invalidation = False
+
+    return translation_cache
@@ -91,6 +91,56 @@ _default_options_objects = [
         'default_value': -1,
         'value_type': 'int'
     },
+    {
+        'name': 'BATCH_TOKEN_BUDGET',
+        'default_value': 4096,
+        'value_type': 'int'
+    },
+    {
+        'name': 'FILE_CHUNK_SIZE',
+        'default_value': 2000,
+        'value_type': 'int'
+    },
+    {
+        'name': 'FILE_TRANSLATION_WORKERS',
+        'default_value': 1,
+        'value_type': 'int'
+    },
+    {
+        'name': 'FILE_TRANSLATION_QUEUE_SIZE',
+        'default_value': 10,
+        'value_type': 'int'
+    },
+    {
+        'name': 'PAIR_CONCURRENCY',
+        'default_value': 0,
+        'value_type': 'int'
+    },
+    {
+        'name': 'PAIR_QUEUE_SIZE',
+        'default_value': 32,
+        'value_type': 'int'
+    },
+    {
+        'name': 'PAIR_RETRY_AFTER',
+        'default_value': 1,
+        'value_type': 'int'
+    },
+    {
+        'name': 'MODEL_IDLE_TIMEOUT',
+        'default_value': 0,
+        'value_type': 'int'
+    },
+    {
+        'name': 'PINNED_MODELS',
+        'default_value': '',
+        'value_type': 'str'
+    },
+    {
+        'name': 'DISABLE_WARM_UP',
+        'default_value': False,
+        'value_type': 'bool'
+    },
     {
         'name': 'GA_ID',
         'default_value': None,
@@ -176,6 +226,11 @@ _default_options_objects = [
         'default_value': 'memory://',
         'value_type': 'str'
     },
+    {
+        'name': 'SHARED_STORAGE_CACHE_TTL',
+        'default_value': 60,
+        'value_type': 'int'
+    },
     {
         'name': 'SECONDARY',
         'default_value': False,
@@ -206,6 +261,16 @@ _default_options_objects = [
         'default_value': False,
         'value_type': 'bool'
     },
+    {
+        'name': 'X_SENDFILE',
+        'default_value': False,
+        'value_type': 'bool'
+    },
+    {
+        'name': 'X_ACCEL_REDIRECT',
+        'default_value': '',
+        'value_type': 'str'
+    },
     {
         'name': 'DISABLE_WEB_UI',
         'default_value': False,
@@ -236,6 +301,26 @@ _default_options_objects = [
         'default_value': '',
         'value_type': 'str'
     },
+    {
+        'name': 'TRANSLATION_CACHE_SIZE',
+        'default_value': 10000,
+        'value_type': 'int'
+    },
+    {
+        'name': 'TRANSLATION_CACHE_AGE',
+        'default_value': 604800,
+        'value_type': 'int'
+    },
+    {
+        'name': 'TRANSLATION_CACHE_STORAGE',
+        'default_value': 'memory://',
+        'value_type': 'str'
+    },
+    {
+        'name': 'TRANSLATION_CACHE_PERSISTENT_SIZE',
+        'default_value': 1000000,
+        'value_type': 'int'
+    },
 ]
 
 
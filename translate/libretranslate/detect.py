@@ -1,12 +1,26 @@
+import threading
 
+import numpy as np
 from langdetect import DetectorFactory
 
 DetectorFactory.seed = 0
 
-from langdetect import detect_langs, LangDetectException
-from langdetect.lang_detect_exception import ErrorCode
+from langdetect import detector_factory
 from lexilang.detector import detect as lldetect
 
+from libretranslate.cache import MemoryTier
+
+# Same smoothing and reporting threshold as langdetect
+ALPHA = 0.5
+BASE_FREQ = 10000
+PROB_THRESHOLD = 0.1
+
+# Detection results are cached for texts up to this length
+CACHE_TEXT_LENGTH = 200
+
+profiles = None
+profiles_lock = threading.Lock()
+
 
 class Language:
   def __init__(self, code, confidence):
@@ -20,7 +34,7 @@ def check_lang(langcodes, lang):
   return normalized_lang_code(lang) in langcodes
 
 def normalized_lang_code(lang):
-  code = lang.lang
+  code = lang if isinstance(lang, str) else lang.lang
   # Handle Chinese
   if code == "zh-cn":
     code = "zh"
@@ -28,27 +42,120 @@ def normalized_lang_code(lang):
     code = "zt"
   return code
 
+def get_profiles():
+  """
+  Returns langdetect's n-gram profiles as (langlist, ngram -> row dict,
+  matrix of smoothed log probabilities with one column per language).
+  Built once, read-only afterwards.
+  """
+  global profiles
+
+  with profiles_lock:
+    if profiles is None:
+      detector_factory.init_factory()
+      factory = detector_factory._factory
+      vocabulary = {ngram: i for i, ngram in enumerate(factory.word_lang_prob_map)}
+      matrix = np.array(list(factory.word_lang_prob_map.values()), dtype=np.float32)
+      profiles = (list(factory.langlist), vocabulary, np.log(matrix + ALPHA / BASE_FREQ))
+
+  return profiles
+
+def extract_ngrams(text):
+  d = detector_factory._factory.create()
+  d.append(text)
+  d.cleaning_text()
+  return d._extract_ngrams()
+
 class Detector:
-  def __init__(self, langcodes = ()):
+  """
+  Reusable, thread-safe detector. Texts of a batch are scored together
+  against the n-gram profile matrix (deterministic naive Bayes, without
+  langdetect's random sampling).
+  """
+
+  def __init__(self, langcodes = (), cache_size = 10000):
     self.langcodes = langcodes
+    self.cache = MemoryTier(cache_size, -1)
+
+    langlist, self.vocabulary, self.log_probs = get_profiles()
+    codes = [normalized_lang_code(l) for l in langlist]
+    self.columns = np.array([i for i, c in enumerate(codes) if c in langcodes], dtype=np.intp)
+    self.column_codes = [codes[i] for i in self.columns]
 
   def detect(self, text):
-    if len(text) < 20:
-      code, conf = lldetect(text, self.langcodes)
-      if conf > 0:
-        return [Language(code, round(conf * 100))]
-
-    try:
-      top_3_choices = [lang for lang in detect_langs(text) if check_lang(self.langcodes, lang)][:3]
-      if not len(top_3_choices):
-        return [Language("en", 0)]
-      if top_3_choices[0].prob == 0:
-        return [Language("en", 0)]
-    except LangDetectException as e:
-      if e.code == ErrorCode.CantDetectError:
-        return [Language("en", 0)]
-      else:
-        raise e
+    return self.detect_batch([text])[0]
+
+  def detect_batch(self, texts):
+    """Returns, for each text, a list of up to 3 Language candidates"""
+    results = [None] * len(texts)
+    pending = []
 
-    return [Language(normalized_lang_code(lang), round(lang.prob * 100)) for lang in top_3_choices]
+    for i, text in enumerate(texts):
+      try:
+        cacheable = len(text) <= CACHE_TEXT_LENGTH
+        if cacheable:
+          results[i] = self.cache.get(text)
+          if results[i] is not None:
+            continue
+
+        if len(text) < 20:
+          code, conf = lldetect(text, self.langcodes)
+          if conf > 0:
+            results[i] = ((code, round(conf * 100)),)
+            self.cache.set(text, results[i])
+            continue
+      except Exception as e:
+        # Only this text falls back to "en", not the whole batch
+        print(str(e))
+        results[i] = (("en", 0),)
+        continue
+
+      pending.append(i)
+
+    for i, result in zip(pending, self.score([texts[i] for i in pending])):
+      results[i] = result
+      if len(texts[i]) <= CACHE_TEXT_LENGTH:
+        self.cache.set(texts[i], result)
+
+    return [[Language(code, conf) for code, conf in r] for r in results]
+
+  def score(self, texts):
+    if not texts:
+      return []
+
+    rows = []
+    owners = []
+    for j, text in enumerate(texts):
+      try:
+        ngrams = extract_ngrams(text)
+      except Exception as e:
+        # Scored as "en" with zero confidence, like a text without n-grams
+        print(str(e))
+        ngrams = []
+      rows.extend(self.vocabulary[n] for n in ngrams)
+      owners.extend([j] * len(ngrams))
+
+    scores = np.zeros((len(texts), len(self.columns)))
+    if rows and len(self.columns):
+      np.add.at(scores, np.array(owners, dtype=np.intp), self.log_probs[np.array(rows, dtype=np.intp)][:, self.columns])
+
+    # Normalize the log likelihoods into probabilities
+    scores -= scores.max(axis=1, keepdims=True)
+    probs = np.exp(scores)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    has_ngrams = np.bincount(np.array(owners, dtype=np.intp), minlength=len(texts)) > 0
+
+    results = []
+    for j in range(len(texts)):
+      if not has_ngrams[j] or not len(self.columns):
+        results.append((("en", 0),))
+        continue
+
+      top_3_choices = [k for k in np.argsort(-probs[j])[:3] if probs[j][k] > PROB_THRESHOLD]
+      if not top_3_choices:
+        results.append((("en", 0),))
+      else:
+        results.append(tuple((self.column_codes[k], round(float(probs[j][k]) * 100)) for k in top_3_choices))
 
+    return results
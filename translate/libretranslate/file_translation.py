@@ -0,0 +1,259 @@
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import argostranslatefiles
+
+# Number of characters used to detect the language of a file
+DETECT_SAMPLE_CHARS = 10000
+
+upload_dir = None
+max_workers = 1
+max_jobs = 10
+
+executor = None
+executor_lock = threading.Lock()
+active_jobs = 0
+
+
+def setup(files_dir, workers, queue_size):
+    global upload_dir
+    global max_workers
+    global max_jobs
+
+    upload_dir = files_dir
+    max_workers = workers
+    max_jobs = queue_size
+
+
+def progress_path(job_id):
+    return os.path.join(upload_dir, job_id + ".json")
+
+
+def set_progress(job_id, **fields):
+    # Progress records live next to the uploaded files, so they are visible
+    # to the worker processes and removed by remove_translated_files
+    path = progress_path(job_id)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(fields, f)
+    os.replace(path + ".tmp", path)
+
+
+def get_progress(job_id):
+    """Returns the progress record of a file translation job, or None"""
+    try:
+        job_id = str(uuid.UUID(job_id))
+        with open(progress_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
+
+
+def is_streamable(filepath):
+    return os.path.splitext(filepath)[1].lower() == ".txt"
+
+
+def read_sample(filepath, sample_chars=DETECT_SAMPLE_CHARS):
+    """Returns the beginning of the text of a document, for language detection"""
+    if is_streamable(filepath):
+        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(sample_chars)
+
+    return argostranslatefiles.get_texts(filepath)[:sample_chars]
+
+
+def iter_chunks(f, chunk_chars):
+    """Yields chunks of whole lines of about chunk_chars characters"""
+    lines = []
+    size = 0
+    for line in f:
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_chars:
+            yield "".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines)
+
+
+class ProgressTranslation:
+    """Wraps a translation to count the characters translated through it"""
+
+    def __init__(self, underlying, on_progress):
+        self.underlying = underlying
+        self.on_progress = on_progress
+        self.translated_chars = 0
+
+    def __getattr__(self, name):
+        return getattr(self.underlying, name)
+
+    def hypotheses(self, input_text, num_hypotheses=4):
+        result = self.underlying.hypotheses(input_text, num_hypotheses)
+        self.add(input_text)
+        return result
+
+    def translate(self, input_text):
+        result = self.underlying.translate(input_text)
+        self.add(input_text)
+        return result
+
+    def add(self, input_text):
+        self.translated_chars += len(input_text)
+        self.on_progress(self.translated_chars)
+
+
+def translate_txt(translation, filepath, chunk_chars, on_progress):
+    base, ext = os.path.splitext(filepath)
+    output_path = f"{base}_{translation.to_lang.code}{ext}"
+
+    with open(filepath, "r", encoding="utf-8", errors="replace", newline="") as src, \
+         open(output_path, "w", encoding="utf-8", newline="") as dst:
+        for chunk in iter_chunks(src, chunk_chars):
+            # Keep the line breaks around the chunk, translate what is in between
+            body = chunk.strip("\r\n")
+            if body.strip():
+                start = chunk.index(body)
+                dst.write(chunk[:start] + translation.translate(body) + chunk[start + len(body):])
+            else:
+                dst.write(chunk)
+            dst.flush()
+            on_progress(len(chunk))
+
+    return output_path
+
+
+def translate_file(translation, filepath, job_id, chunk_chars):
+    """
+    Translate a document, recording the job progress under job_id.
+    Text files are read, translated and written chunk by chunk; other
+    formats go through argostranslatefiles.
+    Returns the path of the translated file.
+    """
+    if is_streamable(filepath):
+        total_chars = max(1, os.path.getsize(filepath))
+        done = {"chars": 0}
+
+        def on_progress(chars):
+            done["chars"] += chars
+            set_progress(job_id, status="running", progress=min(100.0, round(done["chars"] * 100 / total_chars, 1)), translatedCharacters=done["chars"])
+
+        set_progress(job_id, status="running", progress=0.0, translatedCharacters=0)
+        output_path = translate_txt(translation, filepath, chunk_chars, on_progress)
+    else:
+        set_progress(job_id, status="running", progress=None, translatedCharacters=0)
+        output_path = argostranslatefiles.translate_file(
+            ProgressTranslation(translation, lambda chars: set_progress(job_id, status="running", progress=None, translatedCharacters=chars)),
+            filepath,
+        )
+
+    return output_path
+
+
+def run(translation, filepath, job_id, chunk_chars):
+    """
+    Translate a document and mark its job as done (or failed).
+    Returns the name of the translated file.
+    """
+    try:
+        translated_filename = os.path.basename(translate_file(translation, filepath, job_id, chunk_chars))
+    except Exception as e:
+        set_progress(job_id, status="error", error=str(e))
+        raise e
+
+    set_progress(job_id, status="done", progress=100.0, filename=translated_filename)
+    return translated_filename
+
+
+def run_job(files_dir, source, target, filepath, job_id, chunk_chars):
+    """Worker process entry point"""
+    global upload_dir
+    upload_dir = files_dir
+
+    from libretranslate.language import get_language_index
+
+    translation = get_language_index().get_translation(source, target)
+    if translation is None:
+        set_progress(job_id, status="error", error=f"{source} -> {target} is not available")
+        return
+
+    try:
+        run(translation, filepath, job_id, chunk_chars)
+    except Exception:
+        pass # Recorded in the job progress
+
+
+def job_done(job_id, future):
+    global active_jobs
+
+    with executor_lock:
+        active_jobs -= 1
+
+    if future.cancelled():
+        return
+
+    e = future.exception()
+    if e is not None:
+        # The worker died before recording the outcome
+        set_progress(job_id, status="error", error=str(e))
+
+
+def get_executor(broken=None):
+    """Returns the worker pool, replacing it if it is the broken one"""
+    global executor
+
+    with executor_lock:
+        if broken is not None and executor is broken:
+            executor.shutdown(wait=False)
+            executor = None
+        if executor is None:
+            # Spawn (not fork) so the workers do not inherit the model threads
+            executor = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return executor
+
+
+def shutdown():
+    with executor_lock:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+atexit.register(shutdown)
+
+
+def submit(source, target, filepath, job_id, chunk_chars):
+    """
+    Queue a document translation in the worker pool.
+    Returns False if too many jobs are already queued or running.
+    """
+    global active_jobs
+
+    with executor_lock:
+        if active_jobs >= max_jobs:
+            return False
+        active_jobs += 1
+
+    set_progress(job_id, status="queued", progress=0.0, translatedCharacters=0)
+    try:
+        pool = get_executor()
+        try:
+            future = pool.submit(run_job, upload_dir, source, target, filepath, job_id, chunk_chars)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer): start a new pool
+            future = get_executor(broken=pool).submit(run_job, upload_dir, source, target, filepath, job_id, chunk_chars)
+    except Exception:
+        with executor_lock:
+            active_jobs -= 1
+        try:
+            os.remove(progress_path(job_id))
+        except OSError:
+            pass
+        raise
+
+    future.add_done_callback(lambda f: job_done(job_id, f))
+    return True
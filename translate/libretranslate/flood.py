@@ -32,29 +32,38 @@ def report(request_ip):
         get_storage().inc_hash_int("banned", request_ip)
 
 def decrease(request_ip):
-    s = get_storage()
-    if s.get_hash_int("banned", request_ip) > 0:
-        s.dec_hash_int("banned", request_ip)
+    get_storage().dec_hash_int_if_positive("banned", request_ip)
 
 def has_violation(request_ip):
     s = get_storage()
     return s.get_hash_int("banned", request_ip) > 0
 
-def is_banned(request_ip):
-    s = get_storage()
+def is_banned(request_ip, offences=None):
+    if not active:
+        return False
+
+    if offences is None:
+        offences = get_storage().get_hash_int("banned", request_ip)
 
     # More than X offences?
-    return active and s.get_hash_int("banned", request_ip) >= threshold
+    return offences >= threshold
+
+def valid_fingerprint(fingerprint):
+    return isinstance(fingerprint, str) and fingerprint != ""
 
-def fingerprint_mismatch(request_ip, fingerprint):
-    if not isinstance(fingerprint, str) or fingerprint == "":
+def fingerprint_key(request_ip):
+    return f"fingerprint:{request_ip}"
+
+def fingerprint_mismatch(request_ip, fingerprint, expected=None):
+    """
+    expected is the result of get_or_set_str(fingerprint_key(request_ip), fingerprint, ex=300),
+    if it was already fetched
+    """
+    if not valid_fingerprint(fingerprint):
         return True
-    
-    s = get_storage()
-    k = f"fingerprint:{request_ip}"
-    expected = s.get_str(k)
-    if expected == "":
-        s.set_str(k, fingerprint, ex=300)
-        return False
-    else:
-        return fingerprint != expected
\ No newline at end of file
+
+    if expected is None:
+        expected = get_storage().get_or_set_str(fingerprint_key(request_ip), fingerprint, ex=300)
+
+    # The first fingerprint seen for an IP is remembered for 5 minutes
+    return expected != "" and fingerprint != expected
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import shutil
+import threading
+import time
+
+from libretranslate import file_translation, init, pairs, storage
+from libretranslate.language import get_language_index
+
+# Minimum free space in the upload directory for file translations
+MIN_FREE_BYTES = 100 * 1024 * 1024
+
+
+class HealthState:
+    """
+    Readiness checks for the /health/ready probe. Checks that talk to
+    something outside the process (shared storage, disk) are cached for
+    ttl seconds, so that frequent probes stay cheap
+    """
+
+    def __init__(self, upload_dir=None, ttl=5):
+        self.upload_dir = upload_dir
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.checked_at = 0
+        self.cached = {}
+
+    def check_storage(self):
+        try:
+            storage.get_storage().exists("health")
+            return {"ok": True}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def check_upload_dir(self):
+        if self.upload_dir is None:
+            return None
+        try:
+            free = shutil.disk_usage(self.upload_dir).free
+            return {"ok": free >= MIN_FREE_BYTES and os.access(self.upload_dir, os.W_OK), "freeBytes": free}
+        except OSError as e:
+            return {"ok": False, "error": str(e)}
+
+    def external_checks(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.checked_at >= self.ttl:
+                self.cached = {
+                    "storage": self.check_storage(),
+                    "uploadDir": self.check_upload_dir(),
+                }
+                self.checked_at = now
+            return self.cached
+
+    def status(self):
+        """Returns (ready, details)"""
+        languages = len(get_language_index().languages)
+        details = {
+            "models": {
+                "ok": init.ready.is_set() and languages > 0,
+                "languages": languages,
+                "warmedUp": dict(init.warm_up_report),
+            },
+            "queue": {
+                "pairs": pairs.get_pair_scheduler().queue_depth() if pairs.get_pair_scheduler() is not None else 0,
+                "files": file_translation.active_jobs,
+            },
+        }
+        details.update({k: v for k, v in self.external_checks().items() if v is not None})
+
+        ready = all(v["ok"] for v in details.values() if "ok" in v)
+        return ready, details
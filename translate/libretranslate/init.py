@@ -1,22 +1,99 @@
 
 import os
 import glob
-from argostranslate import package, translate
+import threading
+from timeit import default_timer
+from argostranslate import package
 from packaging import version
+import libretranslate.batch
+import libretranslate.cache
 import libretranslate.language
+import libretranslate.pairs
 
+WARM_UP_TEXT = "Hello world!"
 
-def boot(load_only=None, update_models=False, install_models=False):
-    try:
-        if update_models:
-            check_and_install_models(load_only_lang_codes=load_only, update=update_models)
-        else:
-            check_and_install_models(force=install_models, load_only_lang_codes=load_only)
-    except Exception as e:
-        print("Cannot update models (normal if you're offline): %s" % str(e))
+# Set once boot (including the warm-up) has completed
+ready = threading.Event()
+warm_up_report = {}
+
+# Set once the models have been checked, so that forked workers don't
+# check them again after a boot in the gunicorn master
+models_checked = False
+
+
+def boot(load_only=None, update_models=False, install_models=False, warm_up=False, pinned_models=None):
+    global models_checked
+
+    ready.clear()
+    if not models_checked:
+        try:
+            if update_models:
+                check_and_install_models(load_only_lang_codes=load_only, update=update_models)
+            else:
+                check_and_install_models(force=install_models, load_only_lang_codes=load_only)
+        except Exception as e:
+            print("Cannot update models (normal if you're offline): %s" % str(e))
+        models_checked = True
+
+    if warm_up:
+        warm_up_models(get_warm_up_pairs(load_only, pinned_models))
+
+    ready.set()
+
+
+def get_warm_up_pairs(load_only=None, pinned_models=None):
+    """
+    Returns the (source, target) pairs to warm up: the pairs between the
+    --load-only languages, or else the --pinned-models pairs
+    """
+    index = libretranslate.language.get_language_index()
+    if load_only:
+        codes = set(libretranslate.language.iso2model(load_only))
+        pairs = [p for p in index.translations if p[0] in codes and p[1] in codes]
+    else:
+        pairs = [p for p in libretranslate.pairs.parse_pairs(pinned_models) if p in index.translations]
+
+    # Pivot translations are warmed up through their direct pairs
+    return [p for p in sorted(pairs) if libretranslate.batch.get_package_translation(index.get_translation(*p)) is not None]
+
+
+def preload_tokenizers(pairs):
+    """
+    Loads the tokenizers and the language detector profiles.
+    These hold no threads, so they can be loaded in a parent process and
+    shared copy-on-write with forked workers
+    """
+    index = libretranslate.language.get_language_index()
+    for p in pairs:
+        pkg = libretranslate.batch.get_package_translation(index.get_translation(*p)).pkg
+        if hasattr(pkg.tokenizer, "lazy_processor"):
+            pkg.tokenizer.lazy_processor()
+
+    libretranslate.language.get_detector(libretranslate.language.load_lang_codes())
+
+
+def warm_up_models(pairs):
+    """Loads the models of the given pairs and runs a synthetic translation through each"""
+    index = libretranslate.language.get_language_index()
+    preload_tokenizers(pairs)
+
+    for source, target in pairs:
+        start = default_timer()
+        try:
+            index.get_translation(source, target).hypotheses(WARM_UP_TEXT, 1)
+            warm_up_report[f"{source}:{target}"] = round(default_timer() - start, 3)
+        except Exception as e:
+            print(f"Cannot warm up {source} -> {target}: {str(e)}")
+            warm_up_report[f"{source}:{target}"] = None
+
+    if pairs:
+        print(f"Warmed up {len([t for t in warm_up_report.values() if t is not None])}/{len(pairs)} language pairs")
 
 
 def check_and_install_models(force=False, load_only_lang_codes=None, update=False):
+    models_changed = False
+    models_version = libretranslate.cache.get_models_version()
+
     # Load custom models if path is provided
     custom_model_path = os.environ.get("CUSTOM_MODEL_PATH")
     if custom_model_path and os.path.isdir(custom_model_path):
@@ -76,14 +153,20 @@ def check_and_install_models(force=False, load_only_lang_codes=None, update=Fals
                                 f"Updating {available_package} ({pack.package_version}->{available_package.package_version}) ..."
                             )
                             pack.update()
+                            models_changed = True
             if not update:
                 print(
                     f"Downloading {available_package} ({available_package.package_version}) ..."
                 )
                 available_package.install()
+                models_changed = True
 
         # reload installed languages
-        libretranslate.language.languages = translate.get_installed_languages()
+        index = libretranslate.language.reload_languages()
         print(
-            f"Loaded support for {len(translate.get_installed_languages())} languages ({len(available_packages)} models total)!"
+            f"Loaded support for {len(index.languages)} languages ({len(available_packages)} models total)!"
         )
+
+    if models_changed or libretranslate.cache.get_models_version() != models_version:
+        # Cached translations were produced by the previous models
+        libretranslate.cache.invalidate()
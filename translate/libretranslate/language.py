@@ -1,11 +1,12 @@
 
 from functools import lru_cache
+from types import MappingProxyType
 
 from argostranslate import translate
 
-from libretranslate.detect import Detector
+from libretranslate.detect import Detector, Language
 
-__languages = None
+__index = None
 aliases = {
     'pb': 'pt-BR',
     'zh': 'zh-Hans',
@@ -34,19 +35,66 @@ def model2iso(lang):
     lang = lang.lower()
     return aliases.get(lang, lang)
 
-def load_languages():
-    global __languages
+class LanguageIndex:
+    """
+    Immutable lookup tables over the installed languages: code -> Language
+    and (source code, target code) -> translation (including pivot translations)
+    """
+
+    def __init__(self, languages):
+        self.languages = tuple(languages)
+        self.by_code = MappingProxyType({l.code: l for l in self.languages})
+
+        translations = {}
+        for l in self.languages:
+            for t in l.translations_from:
+                # Same precedence as Language.get_translation (first match wins)
+                translations.setdefault((l.code, t.to_lang.code), t)
+        self.translations = MappingProxyType(translations)
+
+        self.pairs = MappingProxyType({
+            l.code: sorted([t.to_lang.code for t in l.translations_from]) for l in self.languages
+        })
+
+    def get_language(self, code):
+        return self.by_code.get(code)
+
+    def get_translation(self, source, target):
+        return self.translations.get((source, target))
+
+
+def get_language_index():
+    global __index
 
-    if __languages is None or len(__languages) == 0:
-        __languages = translate.get_installed_languages()
+    if __index is None or len(__index.languages) == 0:
+        __index = LanguageIndex(translate.get_installed_languages())
 
-    return __languages
+    return __index
+
+def reload_languages():
+    """Rebuild the language index, e.g. after models have been installed or updated"""
+    global __index
+
+    # Build the new index fully before swapping it in, so that
+    # concurrent requests see either the old or the new one
+    __index = LanguageIndex(translate.get_installed_languages())
+    load_lang_codes.cache_clear()
+    get_detector.cache_clear()
+
+    return __index
+
+def load_languages():
+    return get_language_index().languages
 
 @lru_cache(maxsize=None)
 def load_lang_codes():
     languages = load_languages()
     return tuple(l.code for l in languages)
 
+@lru_cache(maxsize=None)
+def get_detector(lang_codes):
+    return Detector(lang_codes)
+
 def detect_languages(text):
     # detect batch processing
     if isinstance(text, list):
@@ -57,16 +105,12 @@ def detect_languages(text):
 
     lang_codes = load_lang_codes()
 
-    # get the candidates
+    # get the candidates (a text that fails detection gets "en" with zero confidence)
     candidates = []
-    for t in text:
-        try:
-            d = Detector(lang_codes).detect(t)
-            for i in range(len(d)):
-                d[i].text_length = len(t)
-            candidates.extend(d)
-        except Exception as e:
-            print(str(e))
+    for t, d in zip(text, get_detector(lang_codes).detect_batch(text)):
+        for l in d:
+            l.text_length = len(t)
+        candidates.extend(d)
 
     # total read bytes of the provided text
     text_length_total = sum(c.text_length for c in candidates)
@@ -79,23 +123,18 @@ def detect_languages(text):
     # for multiple occurrences of the same language (can happen on batch detection)
     # calculate the average confidence for each language
     if is_batch:
-        temp_average_list = []
-        for lang_code in lang_codes:
-            # get all candidates for a specific language
-            lc = list(filter(lambda l: l.code == lang_code, candidates))
-            if len(lc) > 1:
-                # if more than one is present, calculate the average confidence
-                lang = lc[0]
-                lang.confidence = sum(l.confidence for l in lc) / len(lc)
-                lang.text_length = sum(l.text_length for l in lc)
-                temp_average_list.append(lang)
-            elif lc:
-                # otherwise just add it to the temporary list
-                temp_average_list.append(lc[0])
-
-        if temp_average_list:
-            # replace the list
-            candidates = temp_average_list
+        totals = {}
+        for c in candidates:
+            t = totals.setdefault(c.code, [0.0, 0, 0])
+            t[0] += c.confidence
+            t[1] += 1
+            t[2] += c.text_length
+
+        candidates = []
+        for code, (confidence, count, text_length) in totals.items():
+            lang = Language(code, confidence / count)
+            lang.text_length = text_length
+            candidates.append(lang)
 
     # sort the candidates descending based on the detected confidence
     candidates.sort(
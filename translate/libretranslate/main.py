@@ -77,6 +77,69 @@ def get_args():
         metavar="<number of texts>",
         help="Set maximum number of texts to translate in a batch request (%(default)s)",
     )
+    parser.add_argument(
+        "--batch-token-budget",
+        default=DEFARGS['BATCH_TOKEN_BUDGET'],
+        type=int,
+        metavar="<number of tokens>",
+        help="Set the maximum number of tokens run through the model at once when translating batch requests, 0 translates texts one at a time (%(default)s)",
+    )
+    parser.add_argument(
+        "--file-chunk-size",
+        default=DEFARGS['FILE_CHUNK_SIZE'],
+        type=int,
+        metavar="<number of characters>",
+        help="Set the number of characters read and translated at a time when translating text files (%(default)s)",
+    )
+    parser.add_argument(
+        "--file-translation-workers",
+        default=DEFARGS['FILE_TRANSLATION_WORKERS'],
+        type=int,
+        metavar="<number of processes>",
+        help="Set the number of worker processes for asynchronous file translations, 0 disables async mode (%(default)s)",
+    )
+    parser.add_argument(
+        "--file-translation-queue-size",
+        default=DEFARGS['FILE_TRANSLATION_QUEUE_SIZE'],
+        type=int,
+        metavar="<number of jobs>",
+        help="Set the maximum number of asynchronous file translations queued or running (%(default)s)",
+    )
+    parser.add_argument(
+        "--pair-concurrency",
+        default=DEFARGS['PAIR_CONCURRENCY'],
+        type=int,
+        metavar="<number of translations>",
+        help="Set the maximum number of concurrent translations per language pair, 0 for no limit (%(default)s)",
+    )
+    parser.add_argument(
+        "--pair-queue-size",
+        default=DEFARGS['PAIR_QUEUE_SIZE'],
+        type=int,
+        metavar="<number of requests>",
+        help="Set the maximum number of requests waiting for a language pair when --pair-concurrency is set, beyond which requests get a 429 (%(default)s)",
+    )
+    parser.add_argument(
+        "--pair-retry-after",
+        default=DEFARGS['PAIR_RETRY_AFTER'],
+        type=int,
+        metavar="<seconds>",
+        help="Set the Retry-After header sent when a language pair is busy (%(default)s)",
+    )
+    parser.add_argument(
+        "--model-idle-timeout",
+        default=DEFARGS['MODEL_IDLE_TIMEOUT'],
+        type=int,
+        metavar="<seconds>",
+        help="Unload language models not used for this many seconds, 0 keeps them loaded (%(default)s)",
+    )
+    parser.add_argument(
+        "--pinned-models",
+        default=DEFARGS['PINNED_MODELS'],
+        type=str,
+        metavar="<comma-separated source:target pairs>",
+        help="Never unload the models of these language pairs, e.g. en:es,es:en (%(default)s)",
+    )
     parser.add_argument(
         "--ga-id",
         type=str,
@@ -177,7 +240,14 @@ def get_args():
         type=str,
         default=DEFARGS['SHARED_STORAGE'],
         metavar="<Storage URI>",
-        help="Shared storage URI to use for multi-process data sharing (e.g. via gunicorn)",
+        help="Shared storage URI to use for multi-process data sharing (e.g. via gunicorn): memory://, shm://[<path>] (all processes of a host) or redis://...",
+    )
+    parser.add_argument(
+        "--shared-storage-cache-ttl",
+        type=int,
+        default=DEFARGS['SHARED_STORAGE_CACHE_TTL'],
+        metavar="<seconds>",
+        help="Cache secrets and the ban list of a redis:// shared storage in each process for up to this many seconds, changes are propagated via pub/sub. 0 disables the cache (%(default)s)",
     )
     parser.add_argument(
         "--secondary",
@@ -213,6 +283,21 @@ def get_args():
         "--disable-files-translation", default=DEFARGS['DISABLE_FILES_TRANSLATION'], action="store_true",
         help="Disable files translation"
     )
+    parser.add_argument(
+        "--disable-warm-up", default=DEFARGS['DISABLE_WARM_UP'], action="store_true",
+        help="Do not load and test the --load-only (or --pinned-models) language pairs at startup"
+    )
+    parser.add_argument(
+        "--x-sendfile", default=DEFARGS['X_SENDFILE'], action="store_true",
+        help="Let the front server send translated files (X-Sendfile header)"
+    )
+    parser.add_argument(
+        "--x-accel-redirect",
+        default=DEFARGS['X_ACCEL_REDIRECT'],
+        type=str,
+        metavar="<URL prefix>",
+        help="Let nginx send translated files from this internal location mapped to the files translation directory (X-Accel-Redirect header) (%(default)s)",
+    )
     parser.add_argument(
         "--disable-web-ui", default=DEFARGS['DISABLE_WEB_UI'], action="store_true", help="Disable web ui"
     )
@@ -240,6 +325,34 @@ def get_args():
         type=str,
         help="Add prefix to URL: example.com:5000/url-prefix/",
     )
+    parser.add_argument(
+        "--translation-cache-size",
+        default=DEFARGS['TRANSLATION_CACHE_SIZE'],
+        type=int,
+        metavar="<number of entries>",
+        help="Set the number of translations kept in the in-memory cache, 0 disables caching (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-cache-age",
+        default=DEFARGS['TRANSLATION_CACHE_AGE'],
+        type=int,
+        metavar="<seconds>",
+        help="Set the maximum age of cached translations, -1 for no limit (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-cache-storage",
+        default=DEFARGS['TRANSLATION_CACHE_STORAGE'],
+        type=str,
+        metavar="<Storage URI>",
+        help="Persistent translation cache storage URI: memory:// (no persistent tier), sqlite://<path> or redis://... (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-cache-persistent-size",
+        default=DEFARGS['TRANSLATION_CACHE_PERSISTENT_SIZE'],
+        type=int,
+        metavar="<number of entries>",
+        help="Set the maximum number of translations kept in a sqlite:// persistent cache (%(default)s)",
+    )
     args = parser.parse_args()
     if args.url_prefix and not args.url_prefix.startswith('/'):
         args.url_prefix = '/' + args.url_prefix
@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+
+pair_scheduler = None
+def get_pair_scheduler():
+    return pair_scheduler
+
+
+class PairBusyError(Exception):
+    pass
+
+
+def package_translations(translation):
+    """Returns the package translations (with a model) used by a translation, following pivots and caches"""
+    if translation is None:
+        return []
+    if hasattr(translation, "pkg") and hasattr(translation, "translator"):
+        return [translation]
+
+    res = []
+    for attr in ("underlying", "t1", "t2"):
+        res.extend(package_translations(getattr(translation, attr, None)))
+    return res
+
+
+class Pair:
+    def __init__(self, concurrency):
+        self.slots = threading.Semaphore(concurrency) if concurrency > 0 else None
+        self.waiting = 0
+
+
+class Model:
+    def __init__(self, translation):
+        self.translation = translation
+        self.active = 0
+        self.last_used = time.time()
+        self.pinned = False
+
+
+class PairScheduler:
+    """
+    Routes translation work per language pair: each pair runs at most
+    concurrency translations at once with up to queue_size requests waiting,
+    beyond which PairBusyError is raised. Models not used for idle_timeout
+    seconds are unloaded, unless pinned.
+    """
+
+    def __init__(self, concurrency=0, queue_size=32, idle_timeout=0, pinned=()):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.pinned = set(pinned)
+        self.pairs = {}
+        self.models = {}
+        self.lock = threading.Lock()
+
+        if idle_timeout > 0:
+            t = threading.Thread(target=self.unload_loop, daemon=True)
+            t.start()
+
+    def acquire(self, source, target, translation):
+        """
+        Waits for a slot of the (source, target) pair and marks its models as in use.
+        Raises PairBusyError if too many requests are already waiting.
+        Returns a token for release()
+        """
+        pair_key = (source, target)
+        with self.lock:
+            pair = self.pairs.get(pair_key)
+            if pair is None:
+                pair = self.pairs[pair_key] = Pair(self.concurrency)
+
+            wait = pair.slots is not None and not pair.slots.acquire(blocking=False)
+            if wait:
+                if pair.waiting >= self.queue_size:
+                    raise PairBusyError(f"{source} -> {target} is busy")
+                pair.waiting += 1
+
+        if wait:
+            try:
+                pair.slots.acquire()
+            finally:
+                with self.lock:
+                    pair.waiting -= 1
+
+        return pair, self.use_models(pair_key, translation)
+
+    def release(self, token):
+        pair, models = token
+        with self.lock:
+            now = time.time()
+            for m in models:
+                m.active -= 1
+                m.last_used = now
+
+        if pair.slots is not None:
+            pair.slots.release()
+
+    @contextmanager
+    def slot(self, source, target, translation):
+        token = self.acquire(source, target, translation)
+        try:
+            yield
+        finally:
+            self.release(token)
+
+    def queue_depth(self):
+        """Number of requests waiting for a slot, across all pairs"""
+        with self.lock:
+            return sum(p.waiting for p in self.pairs.values())
+
+    def use_models(self, pair_key, translation):
+        models = []
+        with self.lock:
+            for t in package_translations(translation):
+                # Keyed by the package pair: translations are recreated when
+                # the languages are reloaded
+                model_key = (t.pkg.from_code, t.pkg.to_code)
+                m = self.models.get(model_key)
+                if m is None:
+                    m = self.models[model_key] = Model(t)
+                elif m.translation is not t:
+                    m.translation = t
+                m.pinned = m.pinned or pair_key in self.pinned
+                m.active += 1
+                models.append(m)
+        return models
+
+    def unload_idle(self):
+        """Drop the models that are not pinned and were not used for idle_timeout seconds"""
+        unloaded = 0
+        with self.lock:
+            cutoff = time.time() - self.idle_timeout
+            for m in self.models.values():
+                if not m.pinned and m.active == 0 and m.last_used < cutoff and m.translation.translator is not None:
+                    # PackageTranslation reloads the model on next use
+                    m.translation.translator = None
+                    unloaded += 1
+        return unloaded
+
+    def unload_loop(self):
+        while True:
+            time.sleep(max(1, min(60, self.idle_timeout / 2)))
+            self.unload_idle()
+
+
+def parse_pairs(value):
+    """Parses "en:es,es:en" into [("en", "es"), ("es", "en")]"""
+    res = []
+    for p in (value or "").split(","):
+        if ":" in p:
+            source, target = p.strip().split(":", 1)
+            res.append((source, target))
+    return res
+
+
+def setup(args):
+    global pair_scheduler
+
+    pinned = parse_pairs(args.pinned_models)
+    pair_scheduler = PairScheduler(args.pair_concurrency, args.pair_queue_size, args.model_idle_timeout, pinned)
+    return pair_scheduler
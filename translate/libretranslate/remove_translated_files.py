@@ -1,4 +1,5 @@
 import atexit
+import json
 import os
 import time
 from datetime import datetime
@@ -6,10 +7,34 @@ from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 
 
+def get_active_jobs(upload_dir: str, now: float):
+    """IDs of the file translation jobs still queued or running"""
+    jobs = set()
+    for f in os.listdir(upload_dir):
+        if not f.endswith(".json"):
+            continue
+        path = os.path.join(upload_dir, f)
+        try:
+            # Records not updated for a day belong to jobs lost in a crash
+            if (now - os.path.getmtime(path)) > 86400:
+                continue
+            with open(path, "r", encoding="utf-8") as fp:
+                if json.load(fp).get("status") in ("queued", "running"):
+                    jobs.add(f[:-len(".json")])
+        except (ValueError, OSError):
+            pass
+    return jobs
+
+
 def remove_translated_files(upload_dir: str):
     now = time.mktime(datetime.now().timetuple())
+    active_jobs = get_active_jobs(upload_dir, now)
 
     for f in os.listdir(upload_dir):
+        # Uploads, translations and progress records are named after their job
+        if f.split(".", 1)[0] in active_jobs:
+            continue
+
         f = os.path.join(upload_dir, f)
         if os.path.isfile(f):
             f_time = os.path.getmtime(f)
@@ -76,13 +76,15 @@ def rotate_secrets():
     s.set_str("secret_0", secret_1)
     s.set_str("secret_1", generate_secret())
 
-def secret_match(secret):
-    s = get_storage()
-    return secret == s.get_str("secret_0") or secret == s.get_str("secret_1")
+def secret_match(secret, secrets=None):
+    """secrets are the values of secret_0 and secret_1, if already fetched"""
+    if secrets is None:
+        secrets = get_storage().get_strs(["secret_0", "secret_1"])
+    return secret in secrets
 
-def secret_bogus_match(secret):
+def secret_bogus_match(secret, bogus_secret=None):
     if random.randint(0, 1) == 0:
-        return secret == get_bogus_secret()
+        return secret == (get_bogus_secret() if bogus_secret is None else bogus_secret)
     return False
 
 def get_current_secret():
@@ -1,11 +1,50 @@
-import redis
+import heapq
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
 import time
+import weakref
+from collections import OrderedDict
+
+import redis
 
 storage = None
 def get_storage():
     return storage
 
+class Batch:
+    """
+    Queues read operations so that storages can run them in one round trip.
+    Each method returns the index of its result in the list returned by execute()
+    """
+    def __init__(self, storage):
+        self.storage = storage
+        self.ops = []
+
+    def add(self, op, *args):
+        self.ops.append((op, args))
+        return len(self.ops) - 1
+
+    def get_str(self, key):
+        return self.add("get_str", key)
+
+    def get_hash_int(self, ns, key):
+        return self.add("get_hash_int", ns, key)
+
+    def get_or_set_str(self, key, value, ex=None):
+        return self.add("get_or_set_str", key, value, ex)
+
+    def execute(self):
+        return self.storage.execute_batch(self.ops)
+
 class Storage:
+    def batch(self):
+        return Batch(self)
+    def execute_batch(self, ops):
+        return [getattr(self, op)(*args) for op, args in ops]
+
     def exists(self, key):
         raise Exception("not implemented")
 
@@ -23,6 +62,11 @@ class Storage:
         raise Exception("not implemented")
     def get_str(self, key):
         raise Exception("not implemented")
+    def get_strs(self, keys):
+        return [self.get_str(k) for k in keys]
+    def get_or_set_str(self, key, value, ex=None):
+        """Atomically returns the current value of key, or sets it and returns an empty string"""
+        raise Exception("not implemented")
 
     def set_hash_int(self, ns, key, value):
         raise Exception("not implemented")
@@ -32,90 +76,407 @@ class Storage:
         raise Exception("not implemented")
     def dec_hash_int(self, ns, key):
         raise Exception("not implemented")
+    def dec_hash_int_if_positive(self, ns, key):
+        raise Exception("not implemented")
 
     def get_hash_keys(self, ns):
         raise Exception("not implemented")
     def del_hash(self, ns, key):
         raise Exception("not implemented")
 
+class MemoryShard:
+    """
+    A lock-protected part of a MemoryStorage. Entries are kept in LRU order as
+    key -> [value, expires, size], with a heap of expiry times for sweeping.
+    Methods other than locked() expect the lock to be held.
+    """
+    def __init__(self, max_bytes):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.expiries = []
+        self.bytes = 0
+        self.max_bytes = max_bytes
+
+    def get(self, key):
+        e = self.entries.get(key)
+        if e is None:
+            return None
+
+        if e[1] is not None and e[1] <= time.time():
+            self.remove(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return e
+
+    def put(self, key, value, expires=None):
+        self.remove(key)
+        size = sys.getsizeof(key) + sys.getsizeof(value) + entry_overhead
+        self.entries[key] = [value, expires, size]
+        self.bytes += size
+        if expires is not None:
+            heapq.heappush(self.expiries, (expires, key))
+
+        self.sweep()
+        self.evict()
+
+    def resize(self, key, delta):
+        self.entries[key][2] += delta
+        self.bytes += delta
+        self.evict()
+
+    def remove(self, key):
+        e = self.entries.pop(key, None)
+        if e is not None:
+            self.bytes -= e[2]
+
+    def sweep(self):
+        now = time.time()
+        while self.expiries and self.expiries[0][0] <= now:
+            expires, key = heapq.heappop(self.expiries)
+            e = self.entries.get(key)
+            if e is not None and e[1] == expires:
+                self.remove(key)
+
+    def evict(self):
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            key, e = self.entries.popitem(last=False)
+            self.bytes -= e[2]
+
+# Rough per-entry bookkeeping cost (list, dict slot), in bytes
+entry_overhead = 120
+
+memory_storages = weakref.WeakSet()
+memory_sweeper = None
+memory_sweeper_lock = threading.Lock()
+
+def sweep_memory_storages(interval):
+    while True:
+        time.sleep(interval)
+        for s in list(memory_storages):
+            s.sweep()
+
 class MemoryStorage(Storage):
-    def __init__(self):
-        self.store = {}
+    """
+    Thread-safe in-memory storage. Keys are spread over lock-striped shards.
+    Expired keys are swept in the background (and on writes), and the least
+    recently used keys are evicted when the estimated size exceeds max_bytes.
+    """
+    def __init__(self, shards=16, max_bytes=256 * 1024 * 1024, sweep_interval=10):
+        global memory_sweeper
+
+        self.shards = [MemoryShard(max_bytes // shards) for _ in range(shards)]
+        self.on_sweep = None # Callback receiving stats() after each sweep
+
+        memory_storages.add(self)
+        with memory_sweeper_lock:
+            if memory_sweeper is None:
+                memory_sweeper = threading.Thread(target=sweep_memory_storages, args=(sweep_interval,), daemon=True)
+                memory_sweeper.start()
+
+    def shard(self, key):
+        return self.shards[hash(key) % len(self.shards)]
+
+    def sweep(self):
+        for sh in self.shards:
+            with sh.lock:
+                sh.sweep()
+
+        if self.on_sweep is not None:
+            self.on_sweep(self.stats())
+
+    def stats(self):
+        return {
+            "keys": sum(len(sh.entries) for sh in self.shards),
+            "bytes": sum(sh.bytes for sh in self.shards),
+        }
+
+    def get_value(self, key, default=None):
+        sh = self.shard(key)
+        with sh.lock:
+            e = sh.get(key)
+            return default if e is None else e[0]
 
     def exists(self, key):
-        return key in self.store
+        return self.get_value(key) is not None
 
     def set_bool(self, key, value):
-        self.store[key] = bool(value)
+        sh = self.shard(key)
+        with sh.lock:
+            sh.put(key, bool(value))
 
     def get_bool(self, key):
-        return bool(self.store[key])
+        return bool(self.get_value(key, False))
 
     def set_int(self, key, value):
-        self.store[key] = int(value)
+        sh = self.shard(key)
+        with sh.lock:
+            sh.put(key, int(value))
 
     def get_int(self, key):
-        return int(self.store.get(key, 0))
+        return int(self.get_value(key, 0))
 
     def set_str(self, key, value, ex=None):
-        self.store[key] = {
-            'value': value,
-            'ex': None if ex is None else time.time() + ex
-        }
+        sh = self.shard(key)
+        with sh.lock:
+            sh.put(key, value, None if ex is None else time.time() + ex)
 
     def get_str(self, key):
-        d = self.store.get(key, {'value': '', 'ex': None})
-        if d['ex'] is None:
-            return d['value']
-        else:
-            if d['ex'] <= time.time():
-                del self.store[key]
-                return ''
-            else:
-                return d['value']
+        return self.get_value(key, '')
+
+    def get_or_set_str(self, key, value, ex=None):
+        sh = self.shard(key)
+        with sh.lock:
+            e = sh.get(key)
+            if e is not None:
+                return e[0]
+            sh.put(key, value, None if ex is None else time.time() + ex)
+            return ''
+
+    def update_hash(self, ns, key, update):
+        """Applies update(current value or None) to a hash field and returns the new value"""
+        sh = self.shard(ns)
+        with sh.lock:
+            e = sh.get(ns)
+            if e is None:
+                sh.put(ns, {})
+                e = sh.entries[ns]
+
+            d = e[0]
+            is_new = key not in d
+            d[key] = update(d.get(key))
+            if is_new:
+                sh.resize(ns, sys.getsizeof(key) + sys.getsizeof(d[key]) + entry_overhead)
+            return d[key]
 
     def set_hash_int(self, ns, key, value):
-        if ns not in self.store:
-            self.store[ns] = {}
-        self.store[ns][key] = int(value)
+        self.update_hash(ns, key, lambda v: int(value))
 
     def get_hash_int(self, ns, key):
-        d = self.store.get(ns, {})
-        return int(d.get(key, 0))
+        sh = self.shard(ns)
+        with sh.lock:
+            e = sh.get(ns)
+            return 0 if e is None else int(e[0].get(key, 0))
 
+    # Missing keys count as 0, as with Redis' HINCRBY
     def inc_hash_int(self, ns, key):
-        if ns not in self.store:
-            self.store[ns] = {}
-
-        if key not in self.store[ns]:
-            self.store[ns][key] = 0
-        else:
-            self.store[ns][key] += 1
+        return self.update_hash(ns, key, lambda v: (v or 0) + 1)
 
     def dec_hash_int(self, ns, key):
-        if ns not in self.store:
-            self.store[ns] = {}
+        return self.update_hash(ns, key, lambda v: (v or 0) - 1)
 
-        if key not in self.store[ns]:
-            self.store[ns][key] = 0
-        else:
-            self.store[ns][key] -= 1
+    def dec_hash_int_if_positive(self, ns, key):
+        sh = self.shard(ns)
+        with sh.lock:
+            e = sh.get(ns)
+            if e is not None and e[0].get(key, 0) > 0:
+                e[0][key] -= 1
 
     def get_all_hash_int(self, ns):
-        if ns in self.store:
-            return [{str(k): int(v)} for k,v in self.store[ns].items()]
-        else:
-            return []
+        sh = self.shard(ns)
+        with sh.lock:
+            e = sh.get(ns)
+            return {} if e is None else {str(k): int(v) for k, v in e[0].items()}
 
     def del_hash(self, ns, key):
-        del self.store[ns][key]
+        sh = self.shard(ns)
+        with sh.lock:
+            e = sh.get(ns)
+            if e is not None and key in e[0]:
+                del e[0][key]
+                sh.resize(ns, -(sys.getsizeof(key) + sys.getsizeof(0) + entry_overhead))
+
+
+class SQLiteStorage(Storage):
+    """
+    Storage in a SQLite database (WAL mode) shared by all the processes of a
+    host, e.g. gunicorn workers. Counters are updated atomically in
+    immediate transactions; expired keys are purged every purge_interval writes.
+    """
+    purge_interval = 100
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.writes = 0
+
+        c = self.conn()
+        c.execute(
+            """CREATE TABLE IF NOT EXISTS kv (
+            "key"	TEXT NOT NULL,
+            "value"	TEXT NOT NULL,
+            "expires"	REAL,
+            PRIMARY KEY("key")
+        );"""
+        )
+        c.execute(
+            """CREATE TABLE IF NOT EXISTS hash (
+            "ns"	TEXT NOT NULL,
+            "key"	TEXT NOT NULL,
+            "value"	INTEGER NOT NULL,
+            PRIMARY KEY("ns", "key")
+        );"""
+        )
+        c.execute('CREATE INDEX IF NOT EXISTS kv_expires ON kv ("expires");')
+
+    def conn(self):
+        # One connection per thread (and per process, connections must not cross a fork)
+        c = getattr(self.local, "conn", None)
+        if c is None or self.local.pid != os.getpid():
+            c = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=OFF")
+            self.local.conn = c
+            self.local.pid = os.getpid()
+        return c
+
+    def transaction(self, fn):
+        c = self.conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(c)
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+
+        self.writes += 1
+        if self.writes % self.purge_interval == 0:
+            c.execute("DELETE FROM kv WHERE expires <= ?", (time.time(),))
+        return result
+
+    def get_value(self, key, default):
+        row = self.conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def set_value(self, key, value, ex=None):
+        self.transaction(lambda c: c.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, None if ex is None else time.time() + ex),
+        ))
+
+    def exists(self, key):
+        return self.get_value(key, None) is not None
+
+    def set_bool(self, key, value):
+        self.set_value(key, "1" if value else "0")
+
+    def get_bool(self, key):
+        return self.get_value(key, "0") == "1"
+
+    def set_int(self, key, value):
+        self.set_value(key, str(int(value)))
+
+    def get_int(self, key):
+        return int(self.get_value(key, 0))
+
+    def set_str(self, key, value, ex=None):
+        self.set_value(key, value, ex=ex)
+
+    def get_str(self, key):
+        return self.get_value(key, "")
+
+    def get_or_set_str(self, key, value, ex=None):
+        def fn(c):
+            row = c.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            c.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, None if ex is None else time.time() + ex),
+            )
+            return ""
+        return self.transaction(fn)
+
+    def set_hash_int(self, ns, key, value):
+        self.transaction(lambda c: c.execute(
+            "INSERT OR REPLACE INTO hash (ns, key, value) VALUES (?, ?, ?)", (ns, key, int(value))
+        ))
+
+    def get_hash_int(self, ns, key):
+        row = self.conn().execute("SELECT value FROM hash WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def add_hash_int(self, ns, key, delta, only_positive=False):
+        def fn(c):
+            row = c.execute("SELECT value FROM hash WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            v = 0 if row is None else row[0]
+            if only_positive and v <= 0:
+                return v
+            c.execute("INSERT OR REPLACE INTO hash (ns, key, value) VALUES (?, ?, ?)", (ns, key, v + delta))
+            return v + delta
+        return self.transaction(fn)
+
+    def inc_hash_int(self, ns, key):
+        return self.add_hash_int(ns, key, 1)
 
+    def dec_hash_int(self, ns, key):
+        return self.add_hash_int(ns, key, -1)
+
+    def dec_hash_int_if_positive(self, ns, key):
+        return self.add_hash_int(ns, key, -1, only_positive=True)
+
+    def get_all_hash_int(self, ns):
+        return {k: int(v) for k, v in self.conn().execute("SELECT key, value FROM hash WHERE ns = ?", (ns,))}
+
+    def del_hash(self, ns, key):
+        self.transaction(lambda c: c.execute("DELETE FROM hash WHERE ns = ? AND key = ?", (ns, key)))
+
+# Returns the value of KEYS[1], or sets it to ARGV[1] (expiring in ARGV[2] seconds, if set)
+# and returns an empty string
+get_or_set_str_lua = """
+local v = redis.call('GET', KEYS[1])
+if v then
+    return v
+end
+if ARGV[2] ~= '' then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+return ''
+"""
 
 class RedisStorage(Storage):
     def __init__(self, redis_uri):
         self.conn = redis.from_url(redis_uri)
         self.conn.ping()
 
+        self.dec_hash_int_if_positive_script = self.conn.register_script("""
+            local v = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+            if v > 0 then
+                return redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+            end
+            return v
+        """)
+
+    def execute_batch(self, ops):
+        # Run all the operations in a single round trip
+        pipe = self.conn.pipeline(transaction=False)
+        for op, args in ops:
+            if op == "get_str":
+                pipe.get(args[0])
+            elif op == "get_hash_int":
+                pipe.hget(args[0], args[1])
+            elif op == "get_or_set_str":
+                key, value, ex = args
+                # Plain EVAL: scripts registered on a pipeline cost an extra SCRIPT EXISTS round trip
+                pipe.eval(get_or_set_str_lua, 1, key, value, "" if ex is None else ex)
+            else:
+                raise Exception("not implemented")
+
+        results = []
+        for (op, args), v in zip(ops, pipe.execute()):
+            if op == "get_hash_int":
+                results.append(0 if v is None else int(v))
+            else:
+                results.append("" if v is None else v.decode('utf-8'))
+        return results
+
     def exists(self, key):
         return bool(self.conn.exists(key))
 
@@ -145,6 +506,12 @@ class RedisStorage(Storage):
         else:
             return v.decode('utf-8')
 
+    def get_strs(self, keys):
+        return ["" if v is None else v.decode('utf-8') for v in self.conn.mget(keys)]
+
+    def get_or_set_str(self, key, value, ex=None):
+        return self.execute_batch([("get_or_set_str", (key, value, ex))])[0]
+
     def get_hash_int(self, ns, key):
         v = self.conn.hget(ns, key)
         if v is None:
@@ -161,18 +528,174 @@ class RedisStorage(Storage):
     def dec_hash_int(self, ns, key):
         return int(self.conn.hincrby(ns, key, -1))
 
+    def dec_hash_int_if_positive(self, ns, key):
+        return int(self.dec_hash_int_if_positive_script(keys=[ns], args=[key]))
+
     def get_all_hash_int(self, ns):
         return {k.decode("utf-8"): int(v) for k,v in self.conn.hgetall(ns).items()}
 
     def del_hash(self, ns, key):
         self.conn.hdel(ns, key)
 
-def setup(storage_uri):
+class NearCacheStorage(Storage):
+    """
+    Process-local cache in front of a RedisStorage, for hot keys that rarely
+    change (secrets, ban list). Reads of keys starting with one of the cached
+    prefixes are served from memory for up to ttl seconds. Writes go through
+    and invalidate the key in every process via Redis pub/sub.
+    """
+    channel = "libretranslate:near_cache"
+
+    def __init__(self, storage, prefixes, ttl, max_len=10000):
+        self.storage = storage
+        self.prefixes = tuple(prefixes)
+        self.ttl = ttl
+        self.max_len = max_len
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.pubsub = storage.conn.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(**{self.channel: self.on_invalidate})
+        self.listener = self.pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def cacheable(self, name):
+        return name.startswith(self.prefixes)
+
+    def cache_get(self, ck):
+        with self.lock:
+            item = self.entries.get(ck)
+            if item is None:
+                return None
+
+            value, expires = item
+            if expires <= time.time():
+                del self.entries[ck]
+                return None
+
+            self.entries.move_to_end(ck)
+            return value
+
+    def cache_set(self, ck, value):
+        with self.lock:
+            self.entries[ck] = (value, time.time() + self.ttl)
+            self.entries.move_to_end(ck)
+            while len(self.entries) > self.max_len:
+                self.entries.popitem(last=False)
+
+    def on_invalidate(self, message):
+        with self.lock:
+            self.entries.pop(message['data'].decode('utf-8'), None)
+
+    def invalidate(self, name, key=None):
+        if not self.cacheable(name):
+            return
+
+        ck = name if key is None else f"{name}\0{key}"
+        with self.lock:
+            self.entries.pop(ck, None)
+        self.storage.conn.publish(self.channel, ck)
+
+    def execute_batch(self, ops):
+        results = [None] * len(ops)
+        misses = []
+        for i, (op, args) in enumerate(ops):
+            if op == "get_str" and self.cacheable(args[0]):
+                results[i] = self.cache_get(args[0])
+            elif op == "get_hash_int" and self.cacheable(args[0]):
+                results[i] = self.cache_get(f"{args[0]}\0{args[1]}")
+            if results[i] is None:
+                misses.append(i)
+
+        if misses:
+            for i, v in zip(misses, self.storage.execute_batch([ops[i] for i in misses])):
+                op, args = ops[i]
+                if op == "get_str" and self.cacheable(args[0]):
+                    self.cache_set(args[0], v)
+                elif op == "get_hash_int" and self.cacheable(args[0]):
+                    self.cache_set(f"{args[0]}\0{args[1]}", v)
+                results[i] = v
+
+        return results
+
+    def exists(self, key):
+        return self.storage.exists(key)
+
+    def set_bool(self, key, value):
+        self.storage.set_bool(key, value)
+        self.invalidate(key)
+
+    def get_bool(self, key):
+        return self.storage.get_bool(key)
+
+    def set_int(self, key, value):
+        self.storage.set_int(key, value)
+        self.invalidate(key)
+
+    def get_int(self, key):
+        return self.storage.get_int(key)
+
+    def set_str(self, key, value, ex=None):
+        self.storage.set_str(key, value, ex=ex)
+        self.invalidate(key)
+
+    def get_str(self, key):
+        return self.execute_batch([("get_str", (key,))])[0]
+
+    def get_strs(self, keys):
+        return self.execute_batch([("get_str", (key,)) for key in keys])
+
+    def get_or_set_str(self, key, value, ex=None):
+        v = self.storage.get_or_set_str(key, value, ex=ex)
+        if v == "":
+            self.invalidate(key)
+        return v
+
+    def set_hash_int(self, ns, key, value):
+        self.storage.set_hash_int(ns, key, value)
+        self.invalidate(ns, key)
+
+    def get_hash_int(self, ns, key):
+        return self.execute_batch([("get_hash_int", (ns, key))])[0]
+
+    def inc_hash_int(self, ns, key):
+        v = self.storage.inc_hash_int(ns, key)
+        self.invalidate(ns, key)
+        return v
+
+    def dec_hash_int(self, ns, key):
+        v = self.storage.dec_hash_int(ns, key)
+        self.invalidate(ns, key)
+        return v
+
+    def dec_hash_int_if_positive(self, ns, key):
+        v = self.storage.dec_hash_int_if_positive(ns, key)
+        self.invalidate(ns, key)
+        return v
+
+    def get_all_hash_int(self, ns):
+        return self.storage.get_all_hash_int(ns)
+
+    def del_hash(self, ns, key):
+        self.storage.del_hash(ns, key)
+        self.invalidate(ns, key)
+
+# Keys served from the near cache: API key secrets and the ban list
+near_cache_prefixes = ("secret_", "banned")
+
+def setup(storage_uri, cache_ttl=0):
     global storage
     if storage_uri.startswith("memory://"):
         storage = MemoryStorage()
     elif storage_uri.startswith("redis://"):
         storage = RedisStorage(storage_uri)
+        if cache_ttl > 0:
+            storage = NearCacheStorage(storage, near_cache_prefixes, cache_ttl)
+    elif storage_uri.startswith("shm://"):
+        db_path = storage_uri[len("shm://"):]
+        if db_path == "":
+            shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            db_path = os.path.join(shm_dir, "libretranslate-storage.db")
+        storage = SQLiteStorage(db_path)
     else:
         raise Exception("Invalid storage URI: " + storage_uri)
 
@@ -0,0 +1,16 @@
+def test_api_health_live(client):
+    response = client.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json["status"] == "ok"
+
+
+def test_api_health_ready(client):
+    response = client.get("/health/ready")
+    checks = response.json["checks"]
+
+    assert response.status_code == 200
+    assert response.json["status"] == "ready"
+    assert checks["models"]["ok"]
+    assert checks["storage"]["ok"]
+    assert checks["queue"]["pairs"] == 0
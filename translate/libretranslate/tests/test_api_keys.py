@@ -0,0 +1,96 @@
+import threading
+import time
+
+from libretranslate.api_keys import RemoteDatabase
+
+
+class FakeResponse:
+    def __init__(self, res, status_code=200):
+        self.res = res
+        self.status_code = status_code
+
+    def json(self):
+        return self.res
+
+
+def make_db(handler, **kwargs):
+    db = RemoteDatabase("http://auth.local", **kwargs)
+    calls = []
+
+    def post(url, data, timeout):
+        calls.append(data["api_key"])
+        return FakeResponse(handler(data["api_key"]))
+
+    db.session.post = post
+    return db, calls
+
+
+def test_remote_database_negative_cache():
+    db, calls = make_db(lambda k: {"req_limit": 10, "char_limit": 100} if k == "good" else {"error": "Invalid"})
+
+    assert db.lookup("good") == (10, 100)
+    assert db.lookup("good") == (10, 100)
+    assert db.lookup("bogus") is None
+    assert db.lookup("bogus") is None
+    assert db.lookup(None) is None
+    assert calls == ["good", "bogus"]
+
+
+def test_remote_database_failures_not_cached():
+    up = {"value": False}
+
+    def handler(k):
+        if not up["value"]:
+            raise ConnectionError("auth service down")
+        return {"req_limit": 10}
+
+    db, calls = make_db(handler)
+
+    assert db.lookup("key") is None
+    assert "key" not in db.cache
+    up["value"] = True
+    assert db.lookup("key") == (10, None)
+
+    # Known keys keep their last limits while the service is down
+    up["value"] = False
+    db.cache["key"] = (db.cache["key"][0], time.time() - 1)
+    db.stale_age = 0
+    assert db.lookup("key") == (10, None)
+    assert calls == ["key", "key", "key"]
+
+
+def test_remote_database_single_flight():
+    release = threading.Event()
+
+    def handler(k):
+        release.wait(5)
+        return {"req_limit": 1}
+
+    db, calls = make_db(handler)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(db.lookup("key"))) for i in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == [(1, None)] * 5
+    assert calls == ["key"]
+
+
+def test_remote_database_stale_while_revalidate():
+    limits = {"req_limit": 1}
+    db, calls = make_db(lambda k: dict(limits), max_cache_age=-1)
+
+    assert db.lookup("key") == (1, None)
+    limits["req_limit"] = 2
+    assert db.lookup("key") == (1, None) # Stale, refreshed in the background
+    future = db.pending.get("key")
+    if future is not None:
+        future.result()
+
+    db.max_cache_age = 60
+    db.cache["key"] = (db.cache["key"][0], time.time() + 60)
+    assert db.lookup("key") == (2, None)
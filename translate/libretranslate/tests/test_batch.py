@@ -0,0 +1,59 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+import stanza
+from argostranslate.translate import PackageTranslation
+
+from libretranslate import batch
+
+
+class FakePipeline:
+    def __init__(self, **kwargs):
+        pass
+
+    def __call__(self, text):
+        return SimpleNamespace(sentences=[SimpleNamespace(text=s) for s in re.findall(r"[^.!?]+[.!?]?", text) if s.strip()])
+
+
+class FakeTokenizer:
+    def encode(self, sentence):
+        return ["▁" + w for w in sentence.split()]
+
+    def decode(self, tokens):
+        return "".join(tokens).replace("▁", " ")
+
+
+class FakeTranslator:
+    def translate_batch(self, tokenized, num_hypotheses=1, **kwargs):
+        return [
+            SimpleNamespace(
+                hypotheses=[[t.upper() + str(i) for t in tokens] for i in range(num_hypotheses)],
+                scores=[0.0] * num_hypotheses,
+            )
+            for tokens in tokenized
+        ]
+
+
+@pytest.fixture
+def translation(tmp_path, monkeypatch):
+    monkeypatch.setattr(stanza, "Pipeline", FakePipeline)
+    monkeypatch.setattr(batch, "sentencizers", {})
+    (tmp_path / "model").mkdir()
+    pkg = SimpleNamespace(package_path=tmp_path, from_code="en", type="translate", target_prefix="", tokenizer=FakeTokenizer())
+    t = PackageTranslation(None, None, pkg)
+    t.translator = FakeTranslator()
+    return t
+
+
+def test_get_package_translation(translation):
+    assert batch.get_package_translation(translation) is translation
+    assert batch.get_package_translation(SimpleNamespace(underlying=translation)) is translation
+    assert batch.get_package_translation(SimpleNamespace(underlying=None)) is None
+
+
+def test_translate_batch_matches_package_translation(translation):
+    texts = ["Hello world. How are you?\nFine!", "One.\n\nTwo.", "Hello world.", ""]
+    expected = [[h.value for h in translation.hypotheses(t, 2)] for t in texts]
+
+    assert batch.translate_batch(translation, texts, 2, 1024) == expected
@@ -0,0 +1,37 @@
+from libretranslate.cache import MemoryTier, SQLiteTier
+
+
+def test_memory_tier_lru_eviction():
+    tier = MemoryTier(max_len=2, max_age=-1)
+    tier.set("a", 1)
+    tier.set("b", 2)
+    tier.get("a")
+    tier.set("c", 3)
+
+    assert tier.get("a") == 1
+    assert tier.get("b") is None
+    assert tier.get("c") == 3
+
+
+def test_memory_tier_expiry():
+    tier = MemoryTier(max_len=10, max_age=-1)
+    tier.set("a", 1)
+    tier.max_age = 1
+    tier.store["a"] = (1, 0)
+
+    assert tier.get("a") is None
+    assert len(tier) == 0
+
+
+def test_sqlite_tier(tmp_path):
+    tier = SQLiteTier(str(tmp_path / "cache.db"), max_len=2, max_age=-1)
+    tier.evict_interval = 1
+    tier.set("a", "1")
+    tier.set("b", "2")
+    tier.set("c", "3")
+
+    assert tier.get("a") is None
+    assert tier.get("c") == "3"
+
+    tier.clear()
+    assert tier.get("c") is None
@@ -0,0 +1,42 @@
+from libretranslate import detect
+from libretranslate.detect import Detector
+
+
+def test_detect_batch():
+    detector = Detector(("en", "es", "fr"))
+    texts = [
+        "This is a sentence written in the English language.",
+        "Esta es una frase escrita en el idioma español.",
+        "Ceci est une phrase écrite en langue française.",
+    ]
+
+    results = detector.detect_batch(texts)
+
+    assert [r[0].code for r in results] == ["en", "es", "fr"]
+    assert [r[0].code for r in detector.detect_batch(texts)] == ["en", "es", "fr"]
+
+
+def test_detect_restricted_languages():
+    detector = Detector(("es",))
+    result = detector.detect("This is a sentence written in the English language.")
+
+    assert all(l.code == "es" for l in result)
+
+
+def test_detect_batch_isolates_errors(monkeypatch):
+    detector = Detector(("en", "es"))
+    extract_ngrams = detect.extract_ngrams
+
+    def failing_extract_ngrams(text):
+        if text.startswith("Esta"):
+            raise ValueError("cannot extract n-grams")
+        return extract_ngrams(text)
+
+    monkeypatch.setattr(detect, "extract_ngrams", failing_extract_ngrams)
+    results = detector.detect_batch([
+        "This is a sentence written in the English language.",
+        "Esta es una frase escrita en el idioma español.",
+    ])
+
+    assert results[0][0].code == "en" and results[0][0].confidence > 0
+    assert [(l.code, l.confidence) for l in results[1]] == [("en", 0)]
@@ -0,0 +1,81 @@
+import io
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+
+from libretranslate import file_translation
+from libretranslate.file_translation import iter_chunks, translate_txt
+
+
+def test_iter_chunks():
+    f = io.StringIO("one\ntwo\nthree\nfour\n")
+
+    assert list(iter_chunks(f, 8)) == ["one\ntwo\n", "three\nfour\n"]
+
+
+def test_translate_txt(tmp_path):
+    src = tmp_path / "file.txt"
+    src.write_text("hello\n\nworld\nagain\n", encoding="utf-8")
+    translation = SimpleNamespace(to_lang=SimpleNamespace(code="es"), translate=str.upper)
+    progress = []
+
+    output_path = translate_txt(translation, str(src), 6, progress.append)
+
+    assert output_path == str(tmp_path / "file_es.txt")
+    with open(output_path, encoding="utf-8") as f:
+        assert f.read() == "HELLO\n\nWORLD\nAGAIN\n"
+    assert sum(progress) == len("hello\n\nworld\nagain\n")
+
+
+def test_progress(tmp_path):
+    file_translation.setup(str(tmp_path), 1, 10)
+    job_id = str(uuid.uuid4())
+
+    assert file_translation.get_progress(job_id) is None
+    assert file_translation.get_progress("../secret") is None
+
+    file_translation.set_progress(job_id, status="running", progress=50.0)
+    assert file_translation.get_progress(job_id) == {"status": "running", "progress": 50.0}
+
+
+class FakeExecutor:
+    def __init__(self, error=None):
+        self.error = error
+        self.submitted = []
+
+    def submit(self, *args):
+        if self.error is not None:
+            raise self.error
+        self.submitted.append(args)
+        return SimpleNamespace(add_done_callback=lambda callback: None)
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_submit_replaces_broken_pool(tmp_path, monkeypatch):
+    file_translation.setup(str(tmp_path), 1, 10)
+    replacement = FakeExecutor()
+    monkeypatch.setattr(file_translation, "executor", FakeExecutor(BrokenProcessPool()))
+    monkeypatch.setattr(file_translation, "ProcessPoolExecutor", lambda *args, **kwargs: replacement)
+    monkeypatch.setattr(file_translation, "active_jobs", 0)
+    job_id = str(uuid.uuid4())
+
+    assert file_translation.submit("en", "es", "file.txt", job_id, 1000)
+    assert file_translation.executor is replacement
+    assert len(replacement.submitted) == 1
+    assert file_translation.get_progress(job_id)["status"] == "queued"
+
+
+def test_submit_failure_is_undone(tmp_path, monkeypatch):
+    file_translation.setup(str(tmp_path), 1, 10)
+    monkeypatch.setattr(file_translation, "executor", FakeExecutor(RuntimeError("cannot schedule new futures after shutdown")))
+    monkeypatch.setattr(file_translation, "active_jobs", 0)
+    job_id = str(uuid.uuid4())
+
+    with pytest.raises(RuntimeError):
+        file_translation.submit("en", "es", "file.txt", job_id, 1000)
+    assert file_translation.active_jobs == 0
+    assert file_translation.get_progress(job_id) is None
@@ -8,3 +8,13 @@ def test_boot_argos():
     boot(["en", "es"])
 
     assert len(package.get_installed_packages()) >= 2
+
+
+def test_boot_warm_up():
+    """Test that the --load-only pairs are warmed up before reporting ready"""
+    from libretranslate import init
+
+    boot(["en", "es"], warm_up=True)
+
+    assert init.ready.is_set()
+    assert init.warm_up_report.get("en:es") is not None
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from libretranslate.language import LanguageIndex
+
+
+def make_languages():
+    en = SimpleNamespace(code="en", name="English", translations_from=[])
+    es = SimpleNamespace(code="es", name="Spanish", translations_from=[])
+    en_es = SimpleNamespace(from_lang=en, to_lang=es)
+    en_es_pivot = SimpleNamespace(from_lang=en, to_lang=es)
+    es_en = SimpleNamespace(from_lang=es, to_lang=en)
+    en.translations_from = [en_es, en_es_pivot]
+    es.translations_from = [es_en]
+    return [en, es], en_es, es_en
+
+
+def test_language_index():
+    languages, en_es, es_en = make_languages()
+    index = LanguageIndex(languages)
+
+    assert index.get_language("es") is languages[1]
+    assert index.get_language("fr") is None
+    assert index.get_translation("en", "es") is en_es
+    assert index.get_translation("es", "en") is es_en
+    assert index.get_translation("es", "fr") is None
+    assert index.pairs["en"] == ["es", "es"]
@@ -0,0 +1,78 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from libretranslate.pairs import PairBusyError, PairScheduler, package_translations
+
+
+class FakePackageTranslation:
+    def __init__(self, from_code="en", to_code="es"):
+        self.pkg = SimpleNamespace(from_code=from_code, to_code=to_code)
+        self.translator = object()
+
+
+class FakeCompositeTranslation:
+    def __init__(self, t1, t2):
+        self.t1 = t1
+        self.t2 = t2
+
+
+def test_package_translations_follows_pivots():
+    t1, t2 = FakePackageTranslation(), FakePackageTranslation()
+    assert package_translations(FakeCompositeTranslation(t1, t2)) == [t1, t2]
+
+
+def test_pair_queue_full():
+    scheduler = PairScheduler(concurrency=1, queue_size=0)
+    with scheduler.slot("en", "es", None):
+        with pytest.raises(PairBusyError):
+            scheduler.acquire("en", "es", None)
+
+        # Other pairs are not affected
+        with scheduler.slot("es", "en", None):
+            pass
+
+
+def test_pair_concurrency():
+    scheduler = PairScheduler(concurrency=1, queue_size=1)
+    token = scheduler.acquire("en", "es", None)
+    acquired = threading.Event()
+
+    def wait():
+        with scheduler.slot("en", "es", None):
+            acquired.set()
+
+    t = threading.Thread(target=wait)
+    t.start()
+    assert not acquired.wait(0.1)
+    scheduler.release(token)
+    t.join(1)
+    assert acquired.is_set()
+
+
+def test_unload_idle():
+    idle, pinned = FakePackageTranslation("en", "es"), FakePackageTranslation("en", "fr")
+    scheduler = PairScheduler(idle_timeout=0.01, pinned=[("en", "fr")])
+    scheduler.idle_timeout = 0 # Do not wait for the unload thread in tests
+
+    with scheduler.slot("en", "es", idle):
+        assert scheduler.unload_idle() == 0
+    with scheduler.slot("en", "fr", pinned):
+        pass
+
+    assert scheduler.unload_idle() == 1
+    assert idle.translator is None
+    assert pinned.translator is not None
+
+
+def test_models_keyed_by_pair():
+    scheduler = PairScheduler()
+    for i in range(3):
+        # e.g. the languages were reloaded
+        t = FakePackageTranslation()
+        with scheduler.slot("en", "es", t):
+            pass
+
+    assert list(scheduler.models) == [("en", "es")]
+    assert scheduler.models[("en", "es")].translation is t
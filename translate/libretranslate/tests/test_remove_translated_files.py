@@ -0,0 +1,23 @@
+import json
+import os
+import time
+
+from libretranslate.remove_translated_files import remove_translated_files
+
+
+def test_remove_translated_files_skips_active_jobs(tmp_path):
+    old = time.time() - 3600
+    files = {
+        "active.doc.txt": None,
+        "active.json": {"status": "running"},
+        "done.doc.txt": None,
+        "done.json": {"status": "done"},
+    }
+    for name, progress in files.items():
+        with open(tmp_path / name, "w", encoding="utf-8") as f:
+            f.write(json.dumps(progress) if progress else "text")
+        os.utime(tmp_path / name, (old, old))
+
+    remove_translated_files(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ["active.doc.txt", "active.json"]
@@ -0,0 +1,129 @@
+import pytest
+
+from libretranslate.storage import MemoryStorage, NearCacheStorage, SQLiteStorage
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_hash_int_counters(backend, tmp_path):
+    s = MemoryStorage() if backend == "memory" else SQLiteStorage(str(tmp_path / "storage.db"))
+
+    assert s.inc_hash_int("banned", "ip") == 1
+    assert s.inc_hash_int("banned", "ip") == 2
+    assert s.get_hash_int("banned", "ip") == 2
+    assert s.dec_hash_int("banned", "ip") == 1
+    assert s.dec_hash_int("banned", "other") == -1
+
+
+def test_memory_storage_batch():
+    s = MemoryStorage()
+    s.set_str("secret_0", "A")
+    s.set_hash_int("banned", "1.2.3.4", 2)
+
+    b = s.batch()
+    secret = b.get_str("secret_0")
+    missing = b.get_str("secret_1")
+    banned = b.get_hash_int("banned", "1.2.3.4")
+    fingerprint = b.get_or_set_str("fingerprint:1.2.3.4", "ua", ex=300)
+    results = b.execute()
+
+    assert results[secret] == "A"
+    assert results[missing] == ""
+    assert results[banned] == 2
+    assert results[fingerprint] == ""
+    assert s.get_or_set_str("fingerprint:1.2.3.4", "other", ex=300) == "ua"
+
+
+def test_memory_storage_dec_hash_int_if_positive():
+    s = MemoryStorage()
+    s.set_hash_int("banned", "ip", 1)
+
+    s.dec_hash_int_if_positive("banned", "ip")
+    s.dec_hash_int_if_positive("banned", "ip")
+    s.dec_hash_int_if_positive("banned", "other")
+
+    assert s.get_hash_int("banned", "ip") == 0
+    assert s.get_hash_int("banned", "other") == 0
+
+
+class FakePubSub:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def subscribe(self, **handlers):
+        self.conn.handlers.update(handlers)
+
+    def run_in_thread(self, **kw):
+        return None
+
+
+class FakeConn:
+    def __init__(self):
+        self.handlers = {}
+
+    def pubsub(self, **kw):
+        return FakePubSub(self)
+
+    def publish(self, channel, message):
+        self.handlers[channel]({"data": message.encode("utf-8")})
+
+
+def test_near_cache_storage():
+    shared = MemoryStorage()
+    shared.conn = FakeConn()
+    shared.set_str("secret_0", "A")
+    s = NearCacheStorage(shared, ("secret_", "banned"), 60)
+
+    assert s.get_str("secret_0") == "A"
+    shared.set_str("secret_0", "B") # Changed by another process without going through the cache
+    assert s.get_str("secret_0") == "A"
+
+    s.set_str("secret_0", "C")
+    assert s.get_strs(["secret_0", "secret_1"]) == ["C", ""]
+
+    s.inc_hash_int("banned", "ip")
+    assert s.get_hash_int("banned", "ip") == 1
+    s.inc_hash_int("banned", "ip")
+    assert s.get_hash_int("banned", "ip") == 2
+
+
+def test_memory_storage_expiry_sweep():
+    s = MemoryStorage(shards=2)
+    s.set_str("fingerprint:a", "x", ex=-1)
+    s.set_str("fingerprint:b", "y", ex=300)
+
+    s.sweep()
+
+    assert s.stats()["keys"] == 1
+    assert s.get_str("fingerprint:a") == ""
+    assert s.get_str("fingerprint:b") == "y"
+
+
+def test_memory_storage_lru_eviction():
+    s = MemoryStorage(shards=1, max_bytes=2000)
+    for i in range(100):
+        s.set_str(f"key:{i}", "value")
+    s.get_str("key:0")
+
+    assert s.stats()["bytes"] <= 2000
+    assert s.stats()["keys"] < 100
+    assert s.get_str("key:99") == "value"
+    assert s.get_str("key:1") == ""
+
+
+def test_sqlite_storage(tmp_path):
+    s = SQLiteStorage(str(tmp_path / "storage.db"))
+    other = SQLiteStorage(str(tmp_path / "storage.db")) # e.g. another gunicorn worker
+
+    s.set_str("secret_0", "A")
+    s.set_str("fingerprint:ip", "x", ex=-1)
+    assert other.get_str("secret_0") == "A"
+    assert other.get_str("fingerprint:ip") == ""
+    assert other.get_or_set_str("fingerprint:ip", "y", ex=300) == ""
+    assert s.get_or_set_str("fingerprint:ip", "z", ex=300) == "y"
+
+    assert s.inc_hash_int("banned", "ip") == 1
+    assert other.inc_hash_int("banned", "ip") == 2
+    other.dec_hash_int_if_positive("banned", "ip")
+    assert s.get_all_hash_int("banned") == {"ip": 1}
+    s.del_hash("banned", "ip")
+    assert other.get_hash_int("banned", "ip") == 0
@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# Load test the API and compare the results with a saved baseline, e.g.:
+#   python scripts/benchmark.py --save baseline.json
+#   python scripts/benchmark.py --compare baseline.json
+#   python scripts/benchmark.py --serve gunicorn --workers 2 --concurrency 8
+#   python scripts/benchmark.py --url http://localhost:5000 --scenarios translate,detect
+#   python scripts/benchmark.py --mix translate=5,translate_batch=2,detect=2,translate_file=1
+#
+# Without --url or --serve the app runs in this process (Flask test client).
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import io
+import json
+import platform
+import random
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from timeit import default_timer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "She went to the market to buy some fresh vegetables.",
+    "Please remember to close the door when you leave.",
+    "He has been learning English for three years.",
+    "The meeting was postponed until next week.",
+    "An example sentence showing how the word is used.",
+]
+
+
+def text(i, sentences=1):
+    return " ".join(SENTENCES[(i + s) % len(SENTENCES)] for s in range(sentences))
+
+
+# Each scenario returns (path, json body or None, form fields or None, file or None, characters)
+def scenario_translate(i, args):
+    q = text(i)
+    return "/translate", {"q": q, "source": args.source, "target": args.target}, None, None, len(q)
+
+
+def scenario_translate_batch(i, args):
+    q = [text(i + n) for n in range(args.batch_size)]
+    return "/translate", {"q": q, "source": args.source, "target": args.target}, None, None, sum(len(t) for t in q)
+
+
+def scenario_translate_html(i, args):
+    q = f"<p>{text(i)}</p><ul><li><b>{text(i + 1)}</b></li><li>{text(i + 2)}</li></ul>"
+    return "/translate", {"q": q, "source": args.source, "target": args.target, "format": "html"}, None, None, len(q)
+
+
+def scenario_detect(i, args):
+    q = text(i)
+    return "/detect", {"q": q}, None, None, len(q)
+
+
+def scenario_translate_file(i, args):
+    content = "\n".join(text(i + n, 3) for n in range(args.file_lines))
+    return "/translate_file", None, {"source": args.source, "target": args.target}, ("benchmark.txt", content.encode("utf-8")), len(content)
+
+
+SCENARIOS = {
+    "translate": scenario_translate,
+    "translate_batch": scenario_translate_batch,
+    "translate_html": scenario_translate_html,
+    "detect": scenario_detect,
+    "translate_file": scenario_translate_file,
+}
+
+
+def scenario_mix(weights):
+    names = list(weights)
+    values = [weights[n] for n in names]
+
+    def mix(i, args):
+        name = random.Random(i).choices(names, values)[0]
+        return SCENARIOS[name](i, args)
+
+    return mix
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def post(self, path, json_body, form, file):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+
+        if file is not None:
+            data = dict(form)
+            data["file"] = (io.BytesIO(file[1]), file[0])
+            response = client.post(path, data=data, content_type="multipart/form-data")
+        else:
+            response = client.post(path, json=json_body)
+        return response.status_code
+
+
+class HTTPClient:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.local = threading.local()
+
+    def post(self, path, json_body, form, file):
+        import requests
+
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+
+        if file is not None:
+            response = session.post(self.url + path, data=form, files={"file": file}, timeout=300)
+        else:
+            response = session.post(self.url + path, json=json_body, timeout=300)
+        return response.status_code
+
+
+def process_rss(pid):
+    """Resident set size (bytes) of a process and its children, None if unknown"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(l.split()[1]) * 1024 for l in f if l.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except (OSError, StopIteration, ValueError):
+        return None
+
+    for c in children:
+        rss += process_rss(c) or 0
+    return rss
+
+
+class RSSSampler:
+    """Samples the RSS of a process tree in the background and keeps the peak"""
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.is_set():
+            rss = process_rss(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(values) - 1)
+    return values[f] + (values[c] - values[f]) * (k - f)
+
+
+def run_scenario(client, scenario, args, rss_pid):
+    for i in range(args.warm_up):
+        client.post(*scenario(i, args)[:4])
+
+    latencies = []
+    chars = 0
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+    deadline = default_timer() + args.duration if args.duration else None
+
+    def worker():
+        nonlocal chars, errors
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None or (deadline is not None and default_timer() > deadline):
+                return
+
+            path, json_body, form, file, n_chars = scenario(i, args)
+            start = default_timer()
+            try:
+                ok = client.post(path, json_body, form, file) == 200
+            except Exception:
+                ok = False
+            elapsed = default_timer() - start
+
+            with lock:
+                latencies.append(elapsed)
+                if ok:
+                    chars += n_chars
+                else:
+                    errors += 1
+
+    with RSSSampler(rss_pid) as rss:
+        start = default_timer()
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = default_timer() - start
+
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "requests_per_s": round(len(latencies) / elapsed, 2),
+        "chars_per_s": round(chars / elapsed, 1),
+        "peak_rss_mb": round(rss.peak / 1024 / 1024, 1) if rss.peak is not None else None,
+    }
+
+
+def app_kwargs(app_args):
+    """Converts command line options to wsgi:app(...) keyword arguments"""
+    tokens = shlex.split(app_args)
+    kwargs = []
+    for i, t in enumerate(tokens):
+        if not t.startswith("--"):
+            continue
+        name = t[2:].replace("-", "_")
+        if i + 1 < len(tokens) and not tokens[i + 1].startswith("--"):
+            kwargs.append(f'{name}="{tokens[i + 1]}"')
+        else:
+            kwargs.append(f"{name}=true")
+    return ",".join(kwargs)
+
+
+def start_server(args):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    if args.serve == "waitress":
+        cmd = [sys.executable, "main.py", "--host", "127.0.0.1", "--port", str(port), *shlex.split(args.app_args)]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "scripts/gunicorn_conf.py", "--bind", f"127.0.0.1:{port}",
+               "--workers", str(args.workers), f"wsgi:app({app_kwargs(args.app_args)})"]
+
+    proc = subprocess.Popen(cmd, cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+
+    import requests
+
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"{args.serve} exited with code {proc.returncode}")
+        try:
+            if requests.get(url + "/health/ready", timeout=5).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+
+    proc.terminate()
+    sys.exit(f"{args.serve} was not ready after {args.startup_timeout}s")
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Prints the changes from the baseline, returns False on regressions above threshold (%)"""
+    ok = True
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('date')}):")
+    for name, r in results.items():
+        b = baseline["scenarios"].get(name)
+        if b is None:
+            continue
+
+        changes = []
+        for metric, higher_is_better in (("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("requests_per_s", True), ("chars_per_s", True), ("peak_rss_mb", False)):
+            if not r.get(metric) or not b.get(metric):
+                continue
+            change = (r[metric] - b[metric]) * 100 / b[metric]
+            regression = -change if higher_is_better else change
+            flag = ""
+            if metric in ("p95_ms", "requests_per_s") and regression > threshold:
+                flag = " !"
+                ok = False
+            changes.append(f"{metric} {change:+.1f}%{flag}")
+        print(f"{name:>16}: " + ", ".join(changes))
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS), help="Comma separated list of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--mix", type=str, default=None, help="Also run a weighted mix of scenarios, e.g. translate=5,detect=1")
+    parser.add_argument("--url", type=str, default=None, help="Benchmark a running server")
+    parser.add_argument("--serve", choices=["waitress", "gunicorn"], default=None, help="Start a server and benchmark it over HTTP")
+    parser.add_argument("--workers", type=int, default=1, help="Gunicorn workers (with --serve gunicorn)")
+    parser.add_argument("--app-args", type=str, default="--load-only en,es", help="LibreTranslate options of the benchmarked app")
+    parser.add_argument("--startup-timeout", type=int, default=600)
+    parser.add_argument("--source", type=str, default="en")
+    parser.add_argument("--target", type=str, default="es")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--duration", type=float, default=None, help="Stop each scenario after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warm-up", type=int, default=3, help="Unmeasured requests per scenario")
+    parser.add_argument("--batch-size", type=int, default=16, help="Texts per translate_batch request")
+    parser.add_argument("--file-lines", type=int, default=20, help="Lines per translate_file document")
+    parser.add_argument("--save", type=str, default=None, help="Save the results as a JSON baseline")
+    parser.add_argument("--compare", type=str, default=None, help="Compare with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10, help="p95 latency or requests/s regression (%%) that fails --compare")
+    args = parser.parse_args()
+
+    scenarios = {}
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            sys.exit(f"Unknown scenario: {name}")
+        scenarios[name] = SCENARIOS[name]
+    if args.mix:
+        weights = {n: float(w) for n, w in (p.split("=") for p in args.mix.split(","))}
+        for name in weights:
+            if name not in SCENARIOS:
+                sys.exit(f"Unknown scenario: {name}")
+        scenarios["mix"] = scenario_mix(weights)
+
+    server = None
+    if args.serve:
+        server, url = start_server(args)
+        client = HTTPClient(url)
+        rss_pid = server.pid
+        target = f"{args.serve} x{args.workers}" if args.serve == "gunicorn" else args.serve
+    elif args.url:
+        client = HTTPClient(args.url)
+        rss_pid = None
+        target = args.url
+    else:
+        from libretranslate.app import create_app
+        from libretranslate.main import get_args
+
+        sys.argv = [""] + shlex.split(args.app_args)
+        client = InProcessClient(create_app(get_args()))
+        rss_pid = os.getpid()
+        target = "in-process"
+
+    results = {}
+    try:
+        for name, scenario in scenarios.items():
+            results[name] = r = run_scenario(client, scenario, args, rss_pid)
+            print(f"{name:>16}: p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  p99 {r['p99_ms']} ms  "
+                  f"{r['requests_per_s']} req/s  {r['chars_per_s']} chars/s  peak RSS {r['peak_rss_mb']} MB  "
+                  f"({r['errors']}/{r['requests']} errors)")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "commit": get_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": target,
+            "app_args": args.app_args,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+        },
+        "scenarios": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# Compare the per-text translation loop with batched inference
+# on an installed language pair, e.g.:
+#   python scripts/benchmark_batch.py --source en --target vi --texts 50
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+from timeit import default_timer
+
+from argostranslate import translate
+
+from libretranslate import batch
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "A word that is used to describe a person, place or thing.",
+    "She went to the market to buy some fresh vegetables.",
+    "This definition is shown when the word is looked up.",
+    "Please remember to close the door when you leave.",
+    "He has been learning English for three years.",
+    "The meeting was postponed until next week.",
+    "An example sentence showing how the word is used.",
+]
+
+
+def run(label, fn, texts, repeat):
+    fn(texts) # Warm up (loads the model)
+    start = default_timer()
+    for _ in range(repeat):
+        fn(texts)
+    elapsed = default_timer() - start
+    print(f"{label:>8}: {elapsed / repeat * 1000:8.1f} ms/request  {len(texts) * repeat / elapsed:8.1f} texts/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", type=str, default="en")
+    parser.add_argument("--target", type=str, default="vi")
+    parser.add_argument("--texts", type=int, default=50, help="Number of texts per batch request")
+    parser.add_argument("--alternatives", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--token-budget", type=int, default=4096)
+    args = parser.parse_args()
+
+    languages = {l.code: l for l in translate.get_installed_languages()}
+    translator = languages[args.source].get_translation(languages[args.target])
+    package_translation = batch.get_package_translation(translator)
+    if package_translation is None:
+        sys.exit(f"{args.source}->{args.target} is not backed by a single package model, cannot batch")
+
+    texts = [SENTENCES[i % len(SENTENCES)] + ("" if i < len(SENTENCES) else f" ({i})") for i in range(args.texts)]
+    num_hypotheses = args.alternatives + 1
+
+    # Bypass the paragraph cache so that repeated runs are comparable
+    run("loop", lambda t: [package_translation.hypotheses(text, num_hypotheses) for text in t], texts, args.repeat)
+    run("batched", lambda t: batch.translate_batch(package_translation, t, num_hypotheses, args.token_budget), texts, args.repeat)
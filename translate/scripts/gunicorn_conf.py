@@ -1,4 +1,4 @@
-import re
+import ast
 import sys
 
 from prometheus_client import multiprocess
@@ -12,20 +12,14 @@ def on_starting(server):
     proc_name = server.cfg.default_proc_name
     kwargs = {}
     if proc_name.startswith("wsgi:app"):
-        str_args = re.sub(r'wsgi:app\s*\(\s*(.*)\s*\)', '\\1', proc_name).strip().split(",")
-        for a in str_args:
-            if "=" in a:
-                k,v = a.split("=")
-                k = k.strip()
-                v = v.strip()
-
-                if v.lower() in ["true", "false"]:
-                    v = v.lower() == "true"
-                    if not v:
-                        continue
-                elif v[0] == '"':
-                    v = v[1:-1]
-                kwargs[k] = v
+        # Same syntax as gunicorn's own parsing of "module:app(...)"
+        call = ast.parse(proc_name[len("wsgi:"):], mode="eval").body
+        if isinstance(call, ast.Call):
+            for kw in call.keywords:
+                v = ast.literal_eval(kw.value)
+                if v is False:
+                    continue
+                kwargs[kw.arg] = v if isinstance(v, bool) else str(v)
 
     from libretranslate.main import get_args
     sys.argv = ['--wsgi']
@@ -40,8 +34,18 @@ def on_starting(server):
 
     args = get_args()
 
-    from libretranslate import flood, scheduler, secret, storage
-    storage.setup(args.shared_storage)
+    from libretranslate import flood, init, scheduler, secret, storage
+
+    # Install the models and load the tokenizers once in the master, the workers
+    # share them copy-on-write. The translation models themselves are loaded by
+    # each worker (ctranslate2 thread pools do not survive a fork)
+    init.boot(args.load_only, args.update_models, args.force_update_models)
+    if not args.disable_warm_up:
+        init.preload_tokenizers(init.get_warm_up_pairs(args.load_only, args.pinned_models))
+
+    # With a near cache, the master must publish the invalidations of the
+    # secrets and bans written by its scheduled jobs
+    storage.setup(args.shared_storage, args.shared_storage_cache_ttl)
     scheduler.setup(args)
     flood.setup(args)
     secret.setup(args)
\ No newline at end of file
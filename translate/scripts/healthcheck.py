@@ -1,15 +1,19 @@
 import requests
 import os
+import sys
 
 port = os.environ.get('LT_PORT', '5000')
-response = requests.post(
-    url=f'http://localhost:{port}/translate',
-    headers={'Content-Type': 'application/json'},
-    json={
-         'q': 'Hello World!',
-         'source': 'en',
-         'target': 'en'
-    },
-    timeout=60
+url_prefix = os.environ.get('LT_URL_PREFIX', '')
+if url_prefix and not url_prefix.startswith('/'):
+    url_prefix = '/' + url_prefix
+probe = sys.argv[1] if len(sys.argv) > 1 else 'ready'
+
+# Checks the cached readiness state of the server (models loaded, storage
+# reachable, upload directory writable), without running a translation
+response = requests.get(
+    url=f'http://localhost:{port}{url_prefix}/health/{probe}',
+    timeout=10
 )
 # if server unavailable then requests with raise exception and healthcheck will fail
+if response.status_code != 200:
+    sys.exit(f"{probe}: {response.status_code} {response.text}")